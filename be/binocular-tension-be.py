@@ -1,38 +1,48 @@
 import sys
 import math
+import signal
+import argparse
 import numpy as np
 import pyrealsense2 as rs
 from PyQt5.QtWidgets import QApplication, QMainWindow, QSplitter, QLabel, QDesktopWidget, QSizePolicy, QPushButton, QGroupBox, QVBoxLayout, QHBoxLayout, QWidget, QHBoxLayout, QSpacerItem, QMessageBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QCoreApplication, QTimer
 from PyQt5.QtGui import QSurfaceFormat
 from pointcloud import GLWidget  # Assuming you have this in 'pointcloud.py'
 from control_panel import ControlPanelWidget  # Assuming you have this in 'control_panel.py'
 from rgbcam import RGBWidget
 from realsense import RealSenseManager
+from detection_service import DetectionService
+from preset_listener_service import PresetListenerService
+from frame_source import RealSenseFrameSource, RecordingFrameSource, PlaybackFrameSource
 from pointcloud_legend import PCLegendWidget  # Legend for point cloud
 from rgb_legend import RGBLegendWidget        # Legend for RGB camera
 from eye_widget import EyeWidget
+from select_image import add_image_listener
 from plane_legend import PlaneLegendWidget
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, frame_source=None):
         super(MainWindow, self).__init__()
 
-        # Define aspect ratios for each widget
-        self.control_panel_ratio = 1 / 1   # Control panel square aspect ratio
-        self.rgb_ratio = 848 / 480         # RGB widget aspect ratio
-        self.pointcloud_ratio = 848 / 480  # Point cloud widget aspect ratio
-
-        self.rs_manager = RealSenseManager()
+        self.rs_manager = RealSenseManager(frame_source=frame_source)
 
         if not self.rs_manager.initialized:
             print('no camera detected')
             sys.exit(0)  # Exit the program cleanly
 
+        # Define aspect ratios for each widget, following the started stream profile
+        color_intrinsics = self.rs_manager.calibration.color_intrinsics
+        self.control_panel_ratio = 1 / 1   # Control panel square aspect ratio
+        self.rgb_ratio = color_intrinsics.width / color_intrinsics.height         # RGB widget aspect ratio
+        self.pointcloud_ratio = color_intrinsics.width / color_intrinsics.height  # Point cloud widget aspect ratio
+
         # Connect signal only if initialization was successful
         self.rs_manager.camera_disconnected.connect(self.handle_camera_disconnection)
 
+        # Detection and active-movement selection run without any window; the views below only observe
+        self.detection_service = DetectionService(self.rs_manager)
+
 
 
         # Create the splitter
@@ -40,7 +50,7 @@ class MainWindow(QMainWindow):
 
         # Create the layout for the point cloud (with bottom margin)
         self.pointcloud_layout = QVBoxLayout()
-        self.pointcloud = GLWidget(self.rs_manager, self)
+        self.pointcloud = GLWidget(self.rs_manager, self.detection_service, self)
         self.pointcloud.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
         # Create the ControlPanelWidget for the control panel with minimal width
@@ -57,7 +67,7 @@ class MainWindow(QMainWindow):
 
         # Create layout for RGB camera (with bottom margin)
         self.rgb_layout = QVBoxLayout()
-        self.rgb_cam = RGBWidget(self.rs_manager, self)
+        self.rgb_cam = RGBWidget(self.rs_manager, self.detection_service, self)
         self.rgb_cam.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
         # Add RGB camera to layout and set bottom margin
@@ -99,6 +109,7 @@ class MainWindow(QMainWindow):
         self.legend_layout.addWidget(pointcloud_label)
         self.legend_layout.addWidget(pointcloud_legend_container)
         self.eye_widget = EyeWidget(self)  # Initialize EyeWidget
+        add_image_listener(self.eye_widget.image_requested.emit)  # Images are selected off the GUI thread
         self.eye_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
         # Add EyeWidget below the legends
@@ -163,6 +174,8 @@ class MainWindow(QMainWindow):
         self.lower()
         self.show()
 
+        self.detection_service.start()
+
     def handle_camera_disconnection(self):
         QApplication.instance().quit()  # Close the application
 
@@ -209,12 +222,67 @@ class MainWindow(QMainWindow):
         super(MainWindow, self).resizeEvent(event)
 
     def closeEvent(self, event):
-        # Stop the RealSense pipeline when closing the window
+        # Stop the point cloud worker, detection and the RealSense pipeline when closing the window
+        self.pointcloud.stop_processing()
+        self.detection_service.stop()
         self.rs_manager.stop()
         event.accept()
 
+def create_frame_source(args):
+    """Build the frame source selected on the command line (live camera by default)."""
+    if args.playback:
+        return PlaybackFrameSource(args.playback, realtime=not args.max_speed, loop=args.loop)
+    if args.record:
+        return RecordingFrameSource(RealSenseFrameSource(), args.record, compress=args.record_compress)
+    return None
+
+def run_headless(frame_source=None):
+    """Run capture, detection and image selection without any backend window."""
+    app = QCoreApplication(sys.argv[:1])
+
+    rs_manager = RealSenseManager(frame_source=frame_source)
+    if not rs_manager.initialized:
+        print('no camera detected')
+        return 0
+    rs_manager.camera_disconnected.connect(app.quit)
+
+    # Presets from the frontend still reach LiveConfig without the control panel
+    preset_listener = PresetListenerService()
+    preset_listener.start()
+
+    detection_service = DetectionService(rs_manager)
+    detection_service.start()
+
+    # Quit on Ctrl+C / SIGTERM; the timer lets Python handle signals while Qt's loop runs
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    signal_timer = QTimer()
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(200)
+
+    exit_code = app.exec_()
+    detection_service.stop()
+    preset_listener.stop()
+    rs_manager.stop()
+    return exit_code
+
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Binocular Tension backend")
+    parser.add_argument("--record", metavar="DIR",
+                        help="record the camera session to DIR while running; uncompressed chunks take about "
+                             "2.4 MB per frame at 848x480 (roughly 146 MB/s at 60 fps)")
+    parser.add_argument("--record-compress", action="store_true",
+                        help="zlib-compress recorded chunks (several times smaller, costs CPU in the writer thread)")
+    parser.add_argument("--playback", metavar="DIR", help="replay a recorded session instead of the live camera")
+    parser.add_argument("--max-speed", action="store_true", help="replay as fast as possible instead of in real time")
+    parser.add_argument("--loop", action="store_true", help="restart the recording when playback reaches the end")
+    parser.add_argument("--headless", action="store_true", help="run detection and image selection without backend windows")
+    args, qt_args = parser.parse_known_args()
+
+    if args.headless:
+        sys.exit(run_headless(frame_source=create_frame_source(args)))
+
+    app = QApplication(sys.argv[:1] + qt_args)
 
     # Set OpenGL format (optional)
     fmt = QSurfaceFormat()
@@ -223,7 +291,7 @@ if __name__ == '__main__':
     fmt.setProfile(QSurfaceFormat.CoreProfile)
     QSurfaceFormat.setDefaultFormat(fmt)
 
-    window = MainWindow()
+    window = MainWindow(frame_source=create_frame_source(args))
     window.lower()
 
     sys.exit(app.exec_())
@@ -0,0 +1,191 @@
+"""
+Calibration snapshot for the active stream configuration.
+
+A Calibration is built once when a stream starts and holds everything needed to
+turn depth pixels into 3D points: the intrinsics, the depth scale and per-pixel
+unit-ray lookup tables (x/z and y/z). With the tables in place, deprojecting any
+set of pixels is a gather and a multiply instead of one rs2_deproject_pixel_to_point
+call per pixel.
+
+When depth is not aligned to color, the calibration also carries the
+depth-to-color extrinsics so individual pixels and boxes can be mapped between
+the two images without reprojecting the whole depth frame.
+
+Example:
+    calibration = bundle.calibration  # Snapshot the frames were captured under
+    points = calibration.depth_rays.deproject(xs, ys, depth_meters)  # (N, 3)
+"""
+
+import numpy as np
+import pyrealsense2 as rs
+
+# librealsense iterates the Brown-Conrady undistortion a fixed number of times
+UNDISTORT_ITERATIONS = 10
+
+# Working depth range (meters) used to bound where a color pixel can land in the depth image
+DEPTH_SEARCH_NEAR = 0.3
+DEPTH_SEARCH_FAR = 10.0
+
+
+class RayTable:
+    """Per-pixel unit rays (x/z, y/z) for one stream's intrinsics."""
+
+    def __init__(self, intrinsics):
+        self.intrinsics = intrinsics
+        self.width = intrinsics.width
+        self.height = intrinsics.height
+        self.x, self.y = compute_ray_tables(intrinsics)
+        self.x.flags.writeable = False
+        self.y.flags.writeable = False
+
+    def deproject(self, xs, ys, depths):
+        """Deproject integer pixel coordinates with metric depths into (N, 3) camera-space points."""
+        xs = np.asarray(xs, dtype=np.intp)
+        ys = np.asarray(ys, dtype=np.intp)
+        depths = np.asarray(depths, dtype=np.float32)
+        points = np.empty((depths.size, 3), dtype=np.float32)
+        np.multiply(self.x[ys, xs], depths, out=points[:, 0])
+        np.multiply(self.y[ys, xs], depths, out=points[:, 1])
+        points[:, 2] = depths
+        return points
+
+    def deproject_image(self, depth_meters):
+        """Deproject a whole (H, W) metric depth image into (H*W, 3) points, row-major."""
+        points = np.empty((self.height * self.width, 3), dtype=np.float32)
+        depth = depth_meters.reshape(-1)
+        np.multiply(self.x.reshape(-1), depth, out=points[:, 0])
+        np.multiply(self.y.reshape(-1), depth, out=points[:, 1])
+        points[:, 2] = depth
+        return points
+
+
+def compute_ray_tables(intrinsics):
+    """Vectorized equivalent of rs2_deproject_pixel_to_point at unit depth for every pixel."""
+    u = np.arange(intrinsics.width, dtype=np.float32)
+    v = np.arange(intrinsics.height, dtype=np.float32)
+    x = np.broadcast_to((u - intrinsics.ppx) / intrinsics.fx, (intrinsics.height, intrinsics.width)).copy()
+    y = np.broadcast_to(((v - intrinsics.ppy) / intrinsics.fy)[:, None], (intrinsics.height, intrinsics.width)).copy()
+
+    if intrinsics.model in (rs.distortion.inverse_brown_conrady, rs.distortion.brown_conrady):
+        k1, k2, p1, p2, k3 = intrinsics.coeffs[:5]
+        if any(c != 0 for c in (k1, k2, p1, p2, k3)):
+            xo, yo = x.copy(), y.copy()
+            for _ in range(UNDISTORT_ITERATIONS):
+                r2 = x * x + y * y
+                icdist = 1.0 / (1.0 + ((k3 * r2 + k2) * r2 + k1) * r2)
+                xq = x / icdist
+                yq = y / icdist
+                delta_x = 2 * p1 * xq * yq + p2 * (r2 + 2 * xq * xq)
+                delta_y = 2 * p2 * xq * yq + p1 * (r2 + 2 * yq * yq)
+                x = (xo - delta_x) * icdist
+                y = (yo - delta_y) * icdist
+
+    return x.astype(np.float32), y.astype(np.float32)
+
+
+def project_points(points, intrinsics):
+    """Vectorized rs2_project_point_to_pixel for (N, 3) points; returns (N, 2) float pixels."""
+    with np.errstate(divide="ignore", invalid="ignore"):  # Points without depth have no pixel
+        x = points[:, 0] / points[:, 2]
+        y = points[:, 1] / points[:, 2]
+
+    if intrinsics.model in (rs.distortion.modified_brown_conrady, rs.distortion.brown_conrady):
+        k1, k2, p1, p2, k3 = intrinsics.coeffs[:5]
+        r2 = x * x + y * y
+        f = 1 + k1 * r2 + k2 * r2 * r2 + k3 * r2 * r2 * r2
+        x = x * f
+        y = y * f
+        dx = x + 2 * p1 * x * y + p2 * (r2 + 2 * x * x)
+        dy = y + 2 * p2 * x * y + p1 * (r2 + 2 * y * y)
+        x, y = dx, dy
+
+    pixels = np.empty((points.shape[0], 2), dtype=np.float32)
+    pixels[:, 0] = x * intrinsics.fx + intrinsics.ppx
+    pixels[:, 1] = y * intrinsics.fy + intrinsics.ppy
+    return pixels
+
+
+def extrinsics_to_matrix(extrinsics):
+    """Convert column-major rs.extrinsics into a (3, 3) rotation and (3,) translation."""
+    rotation = np.array(extrinsics.rotation, dtype=np.float32).reshape(3, 3).T
+    translation = np.array(extrinsics.translation, dtype=np.float32)
+    return rotation, translation
+
+
+class Calibration:
+    """Immutable snapshot of stream geometry, rebuilt only when the stream profile changes.
+
+    `depth_rays` follow the depth stream intrinsics, `color_rays` follow the color
+    stream, which is the geometry of depth once it is aligned to color. `aligned`
+    records whether the delivered depth image was aligned to color; the two streams
+    may have different resolutions depending on the stream profile.
+    """
+
+    def __init__(self, depth_intrinsics, color_intrinsics, depth_scale, depth_to_color=None, aligned=True):
+        self.depth_intrinsics = depth_intrinsics
+        self.color_intrinsics = color_intrinsics
+        self.depth_scale = float(depth_scale)
+        self.aligned = aligned
+        self.depth_rays = RayTable(depth_intrinsics)
+        self.color_rays = RayTable(color_intrinsics)
+
+        if depth_to_color is not None:
+            self.depth_to_color_rotation, self.depth_to_color_translation = extrinsics_to_matrix(depth_to_color)
+        else:
+            self.depth_to_color_rotation = np.eye(3, dtype=np.float32)
+            self.depth_to_color_translation = np.zeros(3, dtype=np.float32)
+
+    @classmethod
+    def from_source(cls, frame_source):
+        """Query a started FrameSource once and build its calibration."""
+        return cls(
+            frame_source.get_depth_intrinsics(),
+            frame_source.get_color_intrinsics(),
+            frame_source.get_depth_scale(),
+            depth_to_color=frame_source.get_depth_to_color_extrinsics(),
+            aligned=frame_source.is_aligned(),
+        )
+
+    @property
+    def depth_image_intrinsics(self):
+        """Intrinsics of the delivered depth image: color geometry when aligned, depth otherwise."""
+        return self.color_intrinsics if self.aligned else self.depth_intrinsics
+
+    @property
+    def depth_image_rays(self):
+        """Ray table indexed by pixels of the delivered depth image."""
+        return self.color_rays if self.aligned else self.depth_rays
+
+    def depth_points_to_color_pixels(self, points):
+        """Project (N, 3) depth-camera points into color image pixels."""
+        color_points = points @ self.depth_to_color_rotation.T + self.depth_to_color_translation
+        return project_points(color_points, self.color_intrinsics)
+
+    def depth_pixels_to_color_pixels(self, xs, ys, depths):
+        """Map depth pixels with metric depths to (N, 2) color pixels via the extrinsics."""
+        return self.depth_points_to_color_pixels(self.depth_rays.deproject(xs, ys, depths))
+
+    def color_box_to_depth_box(self, x1, y1, x2, y2):
+        """Bound where a color-image box can appear in the depth image.
+
+        Each corner ray is cut at the near and far ends of the working depth range and
+        projected into the depth image; the result is the box around those projections,
+        clipped to the image. This is the sparse equivalent of aligning the whole frame.
+        """
+        xs = np.clip(np.array([x1, x2, x1, x2]), 0, self.color_rays.width - 1)
+        ys = np.clip(np.array([y1, y1, y2, y2]), 0, self.color_rays.height - 1)
+        corners = np.concatenate([
+            self.color_rays.deproject(xs, ys, np.full(4, DEPTH_SEARCH_NEAR)),
+            self.color_rays.deproject(xs, ys, np.full(4, DEPTH_SEARCH_FAR)),
+        ])
+        # Inverse rigid transform, color camera -> depth camera
+        depth_points = (corners - self.depth_to_color_translation) @ self.depth_to_color_rotation
+        pixels = project_points(depth_points, self.depth_intrinsics)
+
+        w, h = self.depth_rays.width, self.depth_rays.height
+        dx1, dy1 = np.floor(pixels.min(axis=0)).astype(int)
+        dx2, dy2 = np.ceil(pixels.max(axis=0)).astype(int)
+        return (
+            int(np.clip(dx1, 0, w - 1)), int(np.clip(dy1, 0, h - 1)),
+            int(np.clip(dx2, 0, w - 1)), int(np.clip(dy2, 0, h - 1)),
+        )
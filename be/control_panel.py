@@ -507,7 +507,9 @@ class ControlPanelWidget(QWidget):
 
     def save_config(self):
         """Save current configuration to config file."""
-        config_data = {
+        # Start from the loaded file so settings without a control here are preserved
+        config_data = dict(self.config)
+        config_data.update({
             "version": self.version[0],
             "rotate_x": self.rotation[0],
             "rotate_y": self.rotation[1],
@@ -541,7 +543,7 @@ class ControlPanelWidget(QWidget):
             "stable_thres_y": self.smoothing[1],
             "detect_people": self.detection_type[0],
             "detect_objects": self.detection_type[1]
-        }
+        })
 
         try:
             print("Translation values being saved:", self.translation)
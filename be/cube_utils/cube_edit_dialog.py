@@ -88,7 +88,7 @@ class CubeEditDialog(QDialog):
         default_cube = {"x": 0, "y": 0, "z": -5, "width": 1, "height": 1, "depth": 1, "rotation_x": 0, "rotation_y": 0, "rotation_z": 0}
 
         # Add the cube to the manager and update the list
-        self.cube_manager.cubes[new_id] = default_cube
+        self.cube_manager.add_cube(new_id, **default_cube)
         new_item = f"Cube {new_id}"
         self.cube_list.addItem(new_item)
         self.cube_list.setCurrentItem(self.cube_list.findItems(new_item, Qt.MatchExactly)[0])
@@ -98,7 +98,7 @@ class CubeEditDialog(QDialog):
         selected_item = self.cube_list.currentItem()
         if selected_item:
             cube_id = selected_item.text().split(" ")[1]
-            del self.cube_manager.cubes[cube_id]
+            self.cube_manager.remove_cube(cube_id)
             self.cube_list.takeItem(self.cube_list.row(selected_item))
             self.current_cube_id = None
             # Clear sliders after deletion
@@ -133,17 +133,19 @@ class CubeEditDialog(QDialog):
     def update_current_cube(self):
         """Update the current cube's data with slider values, applying scaling for decimal steps"""
         if self.current_cube_id:
-            self.cube_manager.cubes[self.current_cube_id] = {
-                "x": self.x_slider.value() * 0.1,
-                "y": self.y_slider.value() * 0.1,
-                "z": self.z_slider.value() * 0.1,
-                "width": self.width_slider.value() * 0.1,
-                "height": self.height_slider.value() * 0.1,
-                "depth": self.depth_slider.value() * 0.1,
-                "rotation_x": self.rotation_x_slider.value(),
-                "rotation_y": self.rotation_y_slider.value(),
-                "rotation_z": self.rotation_z_slider.value()
-            }
+            # Through the manager, so cached cube transforms are rebuilt
+            self.cube_manager.add_cube(
+                self.current_cube_id,
+                x=self.x_slider.value() * 0.1,
+                y=self.y_slider.value() * 0.1,
+                z=self.z_slider.value() * 0.1,
+                width=self.width_slider.value() * 0.1,
+                height=self.height_slider.value() * 0.1,
+                depth=self.depth_slider.value() * 0.1,
+                rotation_x=self.rotation_x_slider.value(),
+                rotation_y=self.rotation_y_slider.value(),
+                rotation_z=self.rotation_z_slider.value()
+            )
 
     def save_changes(self):
         """Save cubes to JSON and close dialog"""
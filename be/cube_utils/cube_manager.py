@@ -1,6 +1,20 @@
 import json
+import math
+import threading
+import numpy as np
 from OpenGL.GL import *
-from OpenGL.GLU import *
+
+POINT_CHUNK = 65536  # Points tested per batch, bounding the (points x cubes) temporaries
+
+
+def cube_rotation(rotation_x, rotation_y, rotation_z):
+    """Rotation Rx * Ry * Rz (degrees): cubes are drawn rotated about x, then y, then z."""
+    ax, ay, az = math.radians(rotation_x), math.radians(rotation_y), math.radians(rotation_z)
+    rx = np.array([[1, 0, 0], [0, math.cos(ax), -math.sin(ax)], [0, math.sin(ax), math.cos(ax)]])
+    ry = np.array([[math.cos(ay), 0, math.sin(ay)], [0, 1, 0], [-math.sin(ay), 0, math.cos(ay)]])
+    rz = np.array([[math.cos(az), -math.sin(az), 0], [math.sin(az), math.cos(az), 0], [0, 0, 1]])
+    return rx @ ry @ rz
+
 
 class CubeManager:
     _instance = None  # Class-level attribute to store the singleton instance
@@ -17,8 +31,23 @@ class CubeManager:
             raise Exception("This class is a singleton! Use `get_instance()` to access it.")
         self.file_path = file_path
         self.cubes = {}
+        self._boxes = None  # Inverse transforms of the cubes, rebuilt after any change
+        self._cubes_version = 0  # Bumped by cubes_changed; a box build from an older version is discarded
+        self._boxes_lock = threading.Lock()  # Cubes change on the GUI thread, boxes are built on the detection thread
+        self._mesh_dirty = True  # Vertex buffers no longer match the cubes
+        self.face_buffer = None
+        self.edge_buffer = None
+        self.face_count = 0
+        self.edge_count = 0
         self.load_cubes()
 
+    def cubes_changed(self):
+        """Drop data derived from the cubes; call after changing `cubes` directly."""
+        with self._boxes_lock:
+            self._cubes_version += 1
+            self._boxes = None
+        self._mesh_dirty = True  # Uploaded on the next draw, where the GL context is current
+
     def load_cubes(self):
         """Load cubes from the JSON file."""
         try:
@@ -26,6 +55,7 @@ class CubeManager:
                 self.cubes = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             self.cubes = {}  # If the file doesn't exist or is invalid, start with an empty dictionary
+        self.cubes_changed()
 
     def save_cubes(self):
         """Save cubes to the JSON file."""
@@ -45,142 +75,129 @@ class CubeManager:
             "rotation_y": rotation_y,
             "rotation_z": rotation_z
         }
+        self.cubes_changed()
 
     def remove_cube(self, cube_id):
         """Remove a cube from the manager."""
         if cube_id in self.cubes:
             del self.cubes[cube_id]
+            self.cubes_changed()
+
+    def _upload_mesh(self):
+        faces, edges = build_cube_mesh(list(self.cubes.values()))
+        if self.face_buffer is None:
+            self.face_buffer, self.edge_buffer = glGenBuffers(2)
+        for buffer, vertices in ((self.face_buffer, faces), (self.edge_buffer, edges)):
+            if len(vertices):
+                glBindBuffer(GL_ARRAY_BUFFER, buffer)
+                glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.face_count, self.edge_count = len(faces), len(edges)
+        self._mesh_dirty = False
 
     def draw_cubes(self):
-        """Draw all cubes currently in the manager."""
-        for cube_id, cube_data in self.cubes.items():
-            x = cube_data['x']
-            y = cube_data['y']
-            z = cube_data['z']
-            width = cube_data['width']
-            height = cube_data['height']
-            depth = cube_data['depth']
-            rotation_x = cube_data['rotation_x']
-            rotation_y = cube_data['rotation_y']
-            rotation_z = cube_data['rotation_z']
-            draw_cube(x, y, z, width, height, depth, rotation_x, rotation_y, rotation_z)
-
-    def is_point_in_cubes(self, point):
-        """Check if a point is within any cube in the manager."""
-        px, py, pz = point
-        for cube_id, cube in self.cubes.items():
-            cx, cy, cz = cube['x'], cube['y'], cube['z']
-            half_width = cube['width'] / 2
-            half_height = cube['height'] / 2
-            half_depth = cube['depth'] / 2
-
-            # Check if point is within the bounds for each dimension
-            in_x = cx - half_width <= px <= cx + half_width
-            in_y = cy - half_height <= py <= cy + half_height
-            in_z = cz - half_depth <= pz <= cz + half_depth
-
-            if in_x and in_y and in_z:
-                return True
-        return False
-
-def draw_cube(x, y, z, width, height, depth, rotation_x=0, rotation_y=0, rotation_z=0):
-    """Draw a cube centered at (x, y, z) with specified width, height, depth, and rotation angles."""
-    glPushMatrix()
-    glTranslatef(x, y, z)
-    
-    # Apply rotations around each axis
-    glRotatef(rotation_x, 1, 0, 0)  # Rotate around X axis
-    glRotatef(rotation_y, 0, 1, 0)  # Rotate around Y axis
-    glRotatef(rotation_z, 0, 0, 1)  # Rotate around Z axis
-    
-    # Set color to semi-transparent blue and enable blending for transparency
-    glColor4f(0.0, 0.0, 1.0, 0.5)  # Semi-transparent blue
-    glEnable(GL_BLEND)
-    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-    
-    # Draw each face of the cube as a filled quad for transparency
-    glBegin(GL_QUADS)
-    
-    # Front face
-    glVertex3f(-width / 2, -height / 2, depth / 2)
-    glVertex3f(width / 2, -height / 2, depth / 2)
-    glVertex3f(width / 2, height / 2, depth / 2)
-    glVertex3f(-width / 2, height / 2, depth / 2)
-    
-    # Back face
-    glVertex3f(-width / 2, -height / 2, -depth / 2)
-    glVertex3f(width / 2, -height / 2, -depth / 2)
-    glVertex3f(width / 2, height / 2, -depth / 2)
-    glVertex3f(-width / 2, height / 2, -depth / 2)
-    
-    # Left face
-    glVertex3f(-width / 2, -height / 2, -depth / 2)
-    glVertex3f(-width / 2, -height / 2, depth / 2)
-    glVertex3f(-width / 2, height / 2, depth / 2)
-    glVertex3f(-width / 2, height / 2, -depth / 2)
-    
-    # Right face
-    glVertex3f(width / 2, -height / 2, -depth / 2)
-    glVertex3f(width / 2, -height / 2, depth / 2)
-    glVertex3f(width / 2, height / 2, depth / 2)
-    glVertex3f(width / 2, height / 2, -depth / 2)
-    
-    # Top face
-    glVertex3f(-width / 2, height / 2, -depth / 2)
-    glVertex3f(width / 2, height / 2, -depth / 2)
-    glVertex3f(width / 2, height / 2, depth / 2)
-    glVertex3f(-width / 2, height / 2, depth / 2)
-    
-    # Bottom face
-    glVertex3f(-width / 2, -height / 2, -depth / 2)
-    glVertex3f(width / 2, -height / 2, -depth / 2)
-    glVertex3f(width / 2, -height / 2, depth / 2)
-    glVertex3f(-width / 2, -height / 2, depth / 2)
-    
-    glEnd()
-
-    # Draw wireframe outline
-    glColor4f(0.0, 0.0, 1.0, 1.0)  # Solid blue for edges
-    glBegin(GL_LINE_LOOP)
-
-    # Front face outline
-    glVertex3f(-width / 2, -height / 2, depth / 2)
-    glVertex3f(width / 2, -height / 2, depth / 2)
-    glVertex3f(width / 2, height / 2, depth / 2)
-    glVertex3f(-width / 2, height / 2, depth / 2)
-
-    # Back face outline
-    glVertex3f(-width / 2, -height / 2, -depth / 2)
-    glVertex3f(width / 2, -height / 2, -depth / 2)
-    glVertex3f(width / 2, height / 2, -depth / 2)
-    glVertex3f(-width / 2, height / 2, -depth / 2)
-
-    # Left face outline
-    glVertex3f(-width / 2, -height / 2, -depth / 2)
-    glVertex3f(-width / 2, -height / 2, depth / 2)
-    glVertex3f(-width / 2, height / 2, depth / 2)
-    glVertex3f(-width / 2, height / 2, -depth / 2)
-
-    # Right face outline
-    glVertex3f(width / 2, -height / 2, -depth / 2)
-    glVertex3f(width / 2, -height / 2, depth / 2)
-    glVertex3f(width / 2, height / 2, depth / 2)
-    glVertex3f(width / 2, height / 2, -depth / 2)
-
-    # Top face outline
-    glVertex3f(-width / 2, height / 2, -depth / 2)
-    glVertex3f(width / 2, height / 2, -depth / 2)
-    glVertex3f(width / 2, height / 2, depth / 2)
-    glVertex3f(-width / 2, height / 2, depth / 2)
-
-    # Bottom face outline
-    glVertex3f(-width / 2, -height / 2, -depth / 2)
-    glVertex3f(width / 2, -height / 2, -depth / 2)
-    glVertex3f(width / 2, -height / 2, depth / 2)
-    glVertex3f(-width / 2, -height / 2, depth / 2)
-
-    glEnd()
-
-    # Disable blending and restore settings
-    glDisable(GL_BLEND)
-    glPopMatrix()
+        """Draw all cubes currently in the manager: one call for the faces, one for the edges."""
+        if self._mesh_dirty:
+            self._upload_mesh()
+        if self.face_count == 0:
+            return
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+
+        # Semi-transparent blue faces
+        glColor4f(0.0, 0.0, 1.0, 0.5)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glBindBuffer(GL_ARRAY_BUFFER, self.face_buffer)
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        glDrawArrays(GL_QUADS, 0, self.face_count)
+
+        # Solid blue edges
+        glColor4f(0.0, 0.0, 1.0, 1.0)
+        glBindBuffer(GL_ARRAY_BUFFER, self.edge_buffer)
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        glDrawArrays(GL_LINES, 0, self.edge_count)
+        glDisable(GL_BLEND)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def _oriented_boxes(self):
+        """(rotations, offsets, half_sizes) mapping points into every cube's frame at once.
+
+        `points @ rotations + offsets` gives (N, 3M) coordinates of each point in each
+        cube's local frame, centered on the cube and with its rotation undone.
+        """
+        with self._boxes_lock:
+            boxes, version = self._boxes, self._cubes_version
+        if boxes is None:
+            cubes = list(self.cubes.values())
+            inverses = [cube_rotation(c['rotation_x'], c['rotation_y'], c['rotation_z']).T for c in cubes]
+            centers = [np.array([c['x'], c['y'], c['z']], dtype=np.float64) for c in cubes]
+            rotations = np.zeros((3, 3 * len(cubes)))
+            offsets = np.zeros(3 * len(cubes))
+            for i, (inverse, center) in enumerate(zip(inverses, centers)):
+                rotations[:, 3 * i:3 * i + 3] = inverse.T  # Row vectors: p @ inverse.T == inverse @ p
+                offsets[3 * i:3 * i + 3] = -inverse @ center
+            half_sizes = np.array([(c['width'], c['height'], c['depth']) for c in cubes], dtype=np.float64).reshape(-1) / 2
+            boxes = (rotations, offsets, half_sizes)
+            with self._boxes_lock:
+                # Cache only if the cubes did not change while building; otherwise the next call rebuilds
+                if self._cubes_version == version:
+                    self._boxes = boxes
+        return boxes
+
+    def points_in_cubes(self, points):
+        """Boolean mask of which (N, 3) points lie within any cube, honoring each cube's rotation.
+
+        All cubes are tested in one matrix product per batch of points, so this is
+        cheap for head points and usable on a whole point cloud.
+        """
+        points = np.asarray(points).reshape(-1, 3)
+        inside = np.zeros(len(points), dtype=bool)
+        rotations, offsets, half_sizes = self._oriented_boxes()
+        cube_count = len(half_sizes) // 3
+        if cube_count == 0:
+            return inside
+        dtype = np.float32 if points.dtype == np.float32 else np.float64  # Keep cloud-sized temporaries small
+        rotations, offsets, half_sizes = rotations.astype(dtype), offsets.astype(dtype), half_sizes.astype(dtype)
+
+        for start in range(0, len(points), POINT_CHUNK):
+            local = points[start:start + POINT_CHUNK] @ rotations
+            local += offsets
+            np.abs(local, out=local)
+            within = (local <= half_sizes).reshape(len(local), cube_count, 3)
+            inside[start:start + POINT_CHUNK] = within.all(axis=2).any(axis=1)
+        return inside
+
+
+# Unit cube faces (GL_QUADS) and its 12 edges (GL_LINES), centered on the origin
+CUBE_FACES = np.array([
+    (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1),        # Front face
+    (-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1),    # Back face
+    (-1, -1, -1), (-1, -1, 1), (-1, 1, 1), (-1, 1, -1),    # Left face
+    (1, -1, -1), (1, -1, 1), (1, 1, 1), (1, 1, -1),        # Right face
+    (-1, 1, -1), (1, 1, -1), (1, 1, 1), (-1, 1, 1),        # Top face
+    (-1, -1, -1), (1, -1, -1), (1, -1, 1), (-1, -1, 1),    # Bottom face
+], dtype=np.float64) / 2
+CUBE_EDGES = CUBE_FACES[[0, 1, 1, 2, 2, 3, 3, 0,           # Front outline
+                         4, 5, 5, 6, 6, 7, 7, 4,           # Back outline
+                         0, 4, 1, 5, 2, 6, 3, 7]]          # Front-to-back edges
+
+
+def build_cube_mesh(cubes):
+    """World-space face and edge vertices of all cubes, as two float32 arrays.
+
+    Each cube is scaled to its size, rotated (Rx * Ry * Rz) and moved to its center,
+    matching a per-cube `glTranslatef` followed by `glRotatef` about x, y and z.
+    """
+    faces, edges = [], []
+    for cube in cubes:
+        scale = np.array([cube['width'], cube['height'], cube['depth']], dtype=np.float64)
+        rotation = cube_rotation(cube['rotation_x'], cube['rotation_y'], cube['rotation_z'])
+        center = np.array([cube['x'], cube['y'], cube['z']], dtype=np.float64)
+        faces.append((CUBE_FACES * scale) @ rotation.T + center)
+        edges.append((CUBE_EDGES * scale) @ rotation.T + center)
+    if not faces:
+        return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.float32)
+    return np.concatenate(faces).astype(np.float32), np.concatenate(edges).astype(np.float32)
@@ -0,0 +1,87 @@
+"""
+Depth post-processing chain applied once per frame in the capture thread.
+
+The chain follows the order librealsense recommends: decimation, then spatial
+and temporal smoothing in the disparity domain, then hole filling. Each filter
+is switched on and tuned from LiveConfig; the chain is rebuilt only when one of
+those settings changes, so the temporal filter keeps its history between frames.
+
+Filters run on the whole frameset before alignment, so every consumer (point
+cloud, peak search, head points) sees the same filtered depth. Decimation
+changes the delivered depth resolution; the frame source reports the new
+intrinsics so the calibration can be rebuilt.
+
+Example:
+    post_processor = DepthPostProcessor()
+    frames = post_processor.process(pipeline.wait_for_frames())
+"""
+
+import pyrealsense2 as rs
+from live_config import LiveConfig
+
+
+class DepthPostProcessor:
+    """Configurable decimation / spatial / temporal / hole-filling chain."""
+
+    def __init__(self):
+        self.live_config = LiveConfig.get_instance()
+        self.settings = None
+        self.filters = []
+
+    def _read_settings(self):
+        c = self.live_config
+        return (
+            bool(c.depth_decimation), int(c.depth_decimation_magnitude),
+            bool(c.depth_spatial), int(c.depth_spatial_magnitude),
+            float(c.depth_spatial_alpha), float(c.depth_spatial_delta),
+            bool(c.depth_temporal), float(c.depth_temporal_alpha),
+            float(c.depth_temporal_delta), int(c.depth_temporal_persistence),
+            bool(c.depth_hole_filling), int(c.depth_hole_filling_mode),
+        )
+
+    def _build_filters(self, settings):
+        (decimation, decimation_magnitude,
+         spatial, spatial_magnitude, spatial_alpha, spatial_delta,
+         temporal, temporal_alpha, temporal_delta, temporal_persistence,
+         hole_filling, hole_filling_mode) = settings
+
+        filters = []
+        if decimation:
+            decimation_filter = rs.decimation_filter()
+            decimation_filter.set_option(rs.option.filter_magnitude, decimation_magnitude)
+            filters.append(decimation_filter)
+
+        # Spatial and temporal filters work best on disparity, where noise is uniform with range
+        if spatial or temporal:
+            filters.append(rs.disparity_transform(True))
+        if spatial:
+            spatial_filter = rs.spatial_filter()
+            spatial_filter.set_option(rs.option.filter_magnitude, spatial_magnitude)
+            spatial_filter.set_option(rs.option.filter_smooth_alpha, spatial_alpha)
+            spatial_filter.set_option(rs.option.filter_smooth_delta, spatial_delta)
+            filters.append(spatial_filter)
+        if temporal:
+            temporal_filter = rs.temporal_filter()
+            temporal_filter.set_option(rs.option.filter_smooth_alpha, temporal_alpha)
+            temporal_filter.set_option(rs.option.filter_smooth_delta, temporal_delta)
+            temporal_filter.set_option(rs.option.holes_fill, temporal_persistence)
+            filters.append(temporal_filter)
+        if spatial or temporal:
+            filters.append(rs.disparity_transform(False))
+
+        if hole_filling:
+            hole_filling_filter = rs.hole_filling_filter()
+            hole_filling_filter.set_option(rs.option.holes_fill, hole_filling_mode)
+            filters.append(hole_filling_filter)
+        return filters
+
+    def process(self, frames):
+        """Filter the depth frame of a frameset; other frames pass through unchanged."""
+        settings = self._read_settings()
+        if settings != self.settings:
+            self.filters = self._build_filters(settings)
+            self.settings = settings
+
+        for depth_filter in self.filters:
+            frames = depth_filter.process(frames).as_frameset()
+        return frames
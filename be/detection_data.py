@@ -21,6 +21,8 @@ class DetectionData:
         self.active_movement_id = None  # ID of the currently active movement
         self.active_movement_type = None  # Type of the currently active movement
         self._is_dark = False  # Boolean indicating if it is currently dark
+        self.active_divider_index = None  # Vertical divider gap holding the active movement, drawn by the viewer
+        self.active_divider_divisions = None  # num_divisions the divider index was computed for
         self.lock = threading.Lock()
 
     # Setter and getter for is_dark
@@ -98,3 +100,16 @@ class DetectionData:
     def get_active_movement_type(self):
         with self.lock:
             return self.active_movement_type
+
+    # Setter and getter for the divider gap highlighted in the point cloud view
+    def set_active_divider_index(self, active_divider_index, num_divisions=None):
+        with self.lock:
+            self.active_divider_index = active_divider_index
+            self.active_divider_divisions = num_divisions
+
+    def get_active_divider_index(self, num_divisions=None):
+        """Return the divider index, or None if it was computed for a different `num_divisions`."""
+        with self.lock:
+            if num_divisions is not None and self.active_divider_divisions not in (None, num_divisions):
+                return None
+            return self.active_divider_index
@@ -0,0 +1,119 @@
+"""
+Headless detection pipeline driven by captured frames.
+
+The service owns everything the installation needs to pick an image for the
+frontend: object detection and tracking, head points, active-movement selection
+and, through `update_active_movement`, the gaze image sent to the frontend.
+It runs on its own thread and processes each new frameset once, whether or not
+any backend window exists.
+
+The RGB view and the point cloud viewer are optional observers: they draw the
+latest `DetectionResult`, either read from `latest` or delivered through the
+`results_ready` signal (queued to the GUI thread).
+
+Example:
+    service = DetectionService(rs_manager)
+    service.results_ready.connect(view.update_frame)  # Optional
+    service.start()
+    ...
+    service.stop()
+"""
+
+import logging
+import threading
+from collections import namedtuple
+from PyQt5.QtCore import QObject, pyqtSignal
+from active_movement_logic import update_active_movement
+from detection_data import DetectionData
+from frame_slot import LATEST_ONLY
+from headpoint_utils import compute_object_points
+from health_metrics import HealthMetrics
+from live_config import LiveConfig
+from movement_detection.object_detection import ObjectDetector
+
+_logger = logging.getLogger(__name__)
+
+# One processed frameset: the frames, their tracked objects, the transformed head
+# points by track id, and the active movement chosen from them
+DetectionResult = namedtuple("DetectionResult", ["frames", "tracked_objects", "headpoints", "active_movement_id"])
+
+
+class DetectionService(QObject):
+    """Detection, head points and active-movement selection on a worker thread."""
+
+    results_ready = pyqtSignal(object)  # DetectionResult for each processed frameset
+
+    def __init__(self, rs_manager):
+        super().__init__()
+        self.rs_manager = rs_manager
+        self.detection_data = DetectionData()
+        self.live_config = LiveConfig.get_instance()
+        self.health_metrics = HealthMetrics()
+        self.object_detector = ObjectDetector()
+
+        # Detection pays for inference, so it only ever looks at the newest frameset
+        self.frame_subscription = self.rs_manager.subscribe_frames("detection", LATEST_ONLY)
+        self.latest = None  # Most recent DetectionResult
+
+        self.running = False
+        self.worker_thread = None
+
+    def start(self):
+        self.running = True
+        self.worker_thread = threading.Thread(target=self._process_loop, daemon=True)
+        self.worker_thread.start()
+
+    def stop(self):
+        """Stop the worker thread; returns once the frame in progress is finished."""
+        self.running = False
+        if self.worker_thread is not None and threading.current_thread() is not self.worker_thread:
+            self.worker_thread.join(timeout=2.0)
+
+    def _process_loop(self):
+        while self.running:
+            frames = self.frame_subscription.wait_for_frames(timeout=0.1)
+            if frames is None:
+                continue
+            # A failing frameset must not end the thread; the next one may be fine
+            try:
+                self.process(frames)
+            except Exception as e:
+                _logger.exception(f"Detection failed on frameset {frames.seq}")
+                self.health_metrics.record_error("detection", e)
+            else:
+                self.health_metrics.record_success("detection")
+
+    def process(self, frames):
+        """Run the full pipeline on one frameset and publish the result."""
+        calibration = frames.calibration  # Intrinsics and depth scale the frames were captured under
+        depth_image = frames.mirrored_depth  # Mirrored like the display image the boxes refer to
+
+        with self.health_metrics.measure("detection"):
+            tracked_objects = self.object_detector.detect_objects(
+                frames.mirrored_color, depth_image, calibration, is_dark=frames.is_dark
+            )
+        self.detection_data.set_object_boxes(tracked_objects)
+
+        rotation = [self.live_config.rotate_x, self.live_config.rotate_y, self.live_config.rotate_z]
+        translation = [self.live_config.translate_x, self.live_config.translate_y, self.live_config.translate_z]
+
+        with self.health_metrics.measure("headpoints"):
+            # Summed-area tables are shared through the bundle and only built when windows are averaged
+            depth_stats = frames.mirrored_depth_stats if self.live_config.headpoint_depth_window > 1 else None
+            headpoints = compute_object_points(
+                tracked_objects, calibration, depth_image, rotation, translation,
+                depth_stats=depth_stats, timestamp=frames.timestamp / 1000.0  # Camera clock, also right for playback
+            )
+            # Also selects the gaze image and sends it to the frontend
+            active_movement_id = update_active_movement(
+                headpoints,
+                image_width=depth_image.shape[1], image_height=depth_image.shape[0],
+                intrinsics=calibration.depth_image_intrinsics
+            )
+        self.detection_data.set_active_movement_id(active_movement_id)
+        if active_movement_id is None:
+            self.detection_data.set_active_divider_index(None)
+
+        self.latest = DetectionResult(frames, tracked_objects, headpoints, active_movement_id)
+        self.results_ready.emit(self.latest)
+        return self.latest
@@ -1,11 +1,12 @@
 import os
 from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout
 from PyQt5.QtGui import QPixmap, QImage
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from PIL import Image
 
 class EyeWidget(QWidget):
     _instance = None  # Class-level attribute to store the singleton instance
+    image_requested = pyqtSignal(str)  # Thread-safe way to show an image; queued to the GUI thread
 
     def __new__(cls, *args, **kwargs):
         # Check if an instance already exists; if so, return it
@@ -28,6 +29,7 @@ class EyeWidget(QWidget):
             layout = QVBoxLayout()
             layout.addWidget(self.label)
             self.setLayout(layout)
+            self.image_requested.connect(self.load_image)
 
             # Load and display the first image by default
             self.display_first_image()
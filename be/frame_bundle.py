@@ -0,0 +1,93 @@
+"""
+Per-frame bundle of captured frames and the images derived from them.
+
+Several stages need the same conversions of a frame (the color array for the
+point cloud texture, mirrored color for detection and display, mirrored depth
+for peak search and head points, depth window statistics for head points). A
+FrameBundle computes each derived view lazily, at most once per frame, and
+shares it read-only with every consumer. Stages that draw on an image copy it
+first.
+
+Example:
+    bundle = subscription.next_frames()
+    display_image = bundle.mirrored_color.copy()  # Writable copy for overlays
+    depth_image = bundle.mirrored_depth            # Shared, read-only
+"""
+
+import functools
+import threading
+import numpy as np
+import cv2
+from depth_stats import DepthWindowStats
+
+
+def derived_image(method):
+    """Memoize a derived image (or index built from one) on the bundle; arrays are marked read-only."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def getter(self):
+        cached = self._cache.get(name)
+        if cached is not None:
+            return cached
+        with self._lock:
+            if name not in self._cache:
+                image = method(self)
+                if isinstance(image, np.ndarray):
+                    image.flags.writeable = False
+                self._cache[name] = image
+            return self._cache[name]
+
+    return property(getter)
+
+
+class FrameBundle:
+    """One captured frameset plus lazily computed, shared derived images.
+
+    `color` is the color frame, or the infrared frame while the scene is dark.
+    `seq` increases monotonically per capture and `timestamp` is the camera's
+    hardware timestamp in milliseconds. `calibration` is the snapshot the frames
+    were captured under, so geometry always matches the images it describes.
+    """
+
+    def __init__(self, color, depth, infrared, seq, timestamp, is_dark, calibration=None):
+        self.color = color
+        self.depth = depth
+        self.infrared = infrared
+        self.seq = seq
+        self.timestamp = timestamp
+        self.is_dark = is_dark
+        self.calibration = calibration
+        self._cache = {}
+        self._lock = threading.RLock()  # Reentrant: derived images build on each other
+
+    @derived_image
+    def color_image(self):
+        """Color frame as an array (2-D when it is infrared)."""
+        return np.asanyarray(self.color.get_data())
+
+    @derived_image
+    def color_bgr(self):
+        """Color frame as 3-channel BGR, replicating infrared across channels."""
+        if self.color_image.ndim == 2:
+            return cv2.cvtColor(self.color_image, cv2.COLOR_GRAY2BGR)
+        return self.color_image
+
+    @derived_image
+    def mirrored_color(self):
+        """BGR image flipped horizontally, as shown to the operator."""
+        return cv2.flip(self.color_bgr, 1)
+
+    @derived_image
+    def depth_image(self):
+        return np.asanyarray(self.depth.get_data())
+
+    @derived_image
+    def mirrored_depth(self):
+        """Depth flipped horizontally to match `mirrored_color`, stored contiguously."""
+        return np.ascontiguousarray(np.fliplr(self.depth_image))
+
+    @derived_image
+    def mirrored_depth_stats(self):
+        """Summed-area tables of `mirrored_depth` for windowed depth means around head peaks."""
+        return DepthWindowStats(self.mirrored_depth)
@@ -0,0 +1,127 @@
+import threading
+from collections import deque
+
+# Consumer delivery modes
+EACH_FRAME = "each"  # Queue every new frameset and hand each out exactly once
+LATEST_ONLY = "latest"  # Hand out only the newest frameset, skipping any missed in between
+
+
+class FrameSubscription:
+    """One consumer's view of the frame slot with duplicate and drop accounting.
+
+    `duplicates` counts `next_frames()` polls that found no new frameset (work that
+    used to be repeated on the same frame); consumers blocking in `wait_for_frames()`
+    never see a frameset twice, so it stays 0 for them. `dropped` counts framesets
+    this consumer never saw.
+    """
+
+    def __init__(self, slot, name, mode=LATEST_ONLY, queue_size=8):
+        if mode not in (EACH_FRAME, LATEST_ONLY):
+            raise ValueError(f"Unknown frame subscription mode: {mode}")
+        self.slot = slot
+        self.name = name
+        self.mode = mode
+        self.delivered = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.last_seq = 0
+        self._queue = deque(maxlen=queue_size)
+
+    def next_frames(self):
+        """Return the next unseen frameset for this consumer, or None if there is none."""
+        return self.slot._next_for(self)
+
+    def wait_for_frames(self, timeout=None):
+        """Block until an unseen frameset is available; None if `timeout` seconds pass first."""
+        return self.slot._wait_for(self, timeout)
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "last_seq": self.last_seq,
+            "delivered": self.delivered,
+            "duplicates": self.duplicates,
+            "dropped": self.dropped,
+        }
+
+
+class LatestFrameSlot:
+    """Lock-protected single-entry mailbox between the capture thread and its consumers.
+
+    The capture thread overwrites the slot with every new frameset, each stamped with
+    a monotonically increasing `seq`. Readers either peek at the newest frameset with
+    `get()` or take frames through a subscription, polling or waiting for the next one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)  # Wakes consumers waiting for a frameset
+        self._frames = None
+        self._subscriptions = []
+
+    def publish(self, frames):
+        """Store a new frameset (which must carry a `seq`) and queue it for per-frame consumers."""
+        with self._lock:
+            self._frames = frames
+            for subscription in self._subscriptions:
+                if subscription.mode == EACH_FRAME:
+                    if len(subscription._queue) == subscription._queue.maxlen:
+                        subscription.dropped += 1  # Oldest queued frameset falls off
+                    subscription._queue.append(frames)
+            self._published.notify_all()
+            return frames.seq
+
+    def get(self):
+        """Return (sequence, frames) for the most recent frameset, or (0, None) if empty."""
+        with self._lock:
+            if self._frames is None:
+                return 0, None
+            return self._frames.seq, self._frames
+
+    def clear(self):
+        """Drop the stored frameset; queued framesets and counters are kept."""
+        with self._lock:
+            self._frames = None
+
+    def subscribe(self, name, mode=LATEST_ONLY, queue_size=8):
+        """Register a consumer that wants each frameset once (EACH_FRAME) or only the newest (LATEST_ONLY)."""
+        subscription = FrameSubscription(self, name, mode, queue_size)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def subscription_stats(self):
+        """Per-consumer delivery counters keyed by subscription name."""
+        with self._lock:
+            return {subscription.name: subscription.stats() for subscription in self._subscriptions}
+
+    def _next_for(self, subscription):
+        with self._lock:
+            if not self._has_new(subscription):
+                subscription.duplicates += 1
+                return None
+            return self._take(subscription)
+
+    def _wait_for(self, subscription, timeout):
+        with self._lock:
+            if not self._published.wait_for(lambda: self._has_new(subscription), timeout):
+                return None
+            return self._take(subscription)
+
+    def _has_new(self, subscription):
+        if subscription.mode == EACH_FRAME:
+            return bool(subscription._queue)
+        return self._frames is not None and self._frames.seq != subscription.last_seq
+
+    def _take(self, subscription):
+        # Caller holds the lock and has checked _has_new
+        if subscription.mode == EACH_FRAME:
+            frames = subscription._queue.popleft()
+        else:
+            frames = self._frames
+            if subscription.last_seq:
+                subscription.dropped += frames.seq - subscription.last_seq - 1
+
+        subscription.last_seq = frames.seq
+        subscription.delivered += 1
+        return frames
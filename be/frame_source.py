@@ -0,0 +1,463 @@
+"""
+Frame sources feeding RealSenseManager.
+
+A FrameSource hands out (color, depth, infrared) framesets together with the
+calibration needed to interpret them. Depth is aligned to color unless the live
+source was started with `align_depth_to_color` turned off.
+
+Three implementations are provided:
+
+    RealSenseFrameSource   - the live camera pipeline
+    RecordingFrameSource   - wraps another source and streams everything it
+                             delivers into a chunked session directory
+    PlaybackFrameSource    - replays a recorded session at real-time or max speed
+
+A recorded session is a directory holding `session.json` (intrinsics, depth
+scale and a chunk index) plus `chunk_00000.npz`, `chunk_00001.npz`, ... each
+with stacked `color`, `depth`, `infrared` and `timestamps` arrays. A depth
+resolution change (decimation toggled while recording) starts a new chunk, and
+every chunk entry carries the depth intrinsics its frames were captured with.
+
+Example:
+    source = RecordingFrameSource(RealSenseFrameSource(), "sessions/evening")
+    rs_manager = RealSenseManager(frame_source=source)
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+import pyrealsense2 as rs
+from live_config import LiveConfig
+from stream_profiles import get_stream_profile
+from depth_filters import DepthPostProcessor
+from health_metrics import HealthMetrics
+
+SESSION_FILE = "session.json"
+
+
+class ArrayFrame:
+    """Minimal stand-in for a pyrealsense2 video frame backed by a NumPy array."""
+
+    def __init__(self, data, timestamp=0.0, frame_number=0):
+        self._data = data
+        self._timestamp = timestamp
+        self._frame_number = frame_number
+
+    def get_data(self):
+        return self._data
+
+    def get_width(self):
+        return self._data.shape[1]
+
+    def get_height(self):
+        return self._data.shape[0]
+
+    def get_timestamp(self):
+        return self._timestamp
+
+    def get_frame_number(self):
+        return self._frame_number
+
+    def keep(self):
+        pass  # Array frames are never recycled by a frame pool
+
+    def __bool__(self):
+        return self._data is not None
+
+
+class FrameSource:
+    """Interface for anything that can deliver framesets."""
+
+    def start(self):
+        """Start delivering frames. Raises RuntimeError if the source cannot start."""
+        raise NotImplementedError
+
+    def wait_for_frames(self, timeout_ms=5000):
+        """Block until the next frameset and return (color, depth, infrared) frames.
+
+        Raises RuntimeError on timeout, disconnection or end of stream.
+        """
+        raise NotImplementedError
+
+    def get_depth_intrinsics(self):
+        raise NotImplementedError
+
+    def get_color_intrinsics(self):
+        raise NotImplementedError
+
+    def get_depth_scale(self):
+        raise NotImplementedError
+
+    def get_depth_to_color_extrinsics(self):
+        raise NotImplementedError
+
+    def is_aligned(self):
+        """Whether delivered depth images are aligned to the color image."""
+        raise NotImplementedError
+
+    def depth_profile_changed(self):
+        """Return True once after the delivered depth resolution changed and intrinsics must be re-read."""
+        return False
+
+    def stop(self):
+        raise NotImplementedError
+
+
+class RealSenseFrameSource(FrameSource):
+    """Live RealSense pipeline, optionally aligning depth to color.
+
+    Full alignment reprojects every depth pixel on every frame. With `align` off the
+    raw depth frame is delivered and consumers map only the pixels they need through
+    the calibration extrinsics.
+    """
+
+    def __init__(self, profile=None, align=None):
+        # Resolutions and frame rate come from the active stream profile unless one is given
+        self.profile = profile if profile is not None else get_stream_profile()
+        self.pipeline = rs.pipeline()
+        self.config = rs.config()
+        self.config.enable_stream(rs.stream.color, self.profile.color_width, self.profile.color_height, rs.format.bgr8, self.profile.fps)
+        self.config.enable_stream(rs.stream.depth, self.profile.depth_width, self.profile.depth_height, rs.format.z16, self.profile.fps)
+        # Infrared is captured by the depth sensor, so it shares the depth resolution
+        self.config.enable_stream(rs.stream.infrared, 1, self.profile.depth_width, self.profile.depth_height, rs.format.y8, self.profile.fps)
+        self.pipeline_profile = None
+        if align is None:
+            align = LiveConfig.get_instance().align_depth_to_color
+        self.align = rs.align(rs.stream.color) if align else None
+        self.post_processor = DepthPostProcessor()
+        self.depth_intrinsics = None  # Intrinsics of the filtered depth, which decimation can shrink
+        self._depth_profile_changed = False
+        self.health_metrics = HealthMetrics()
+
+    def start(self):
+        self.pipeline_profile = self.pipeline.start(self.config)
+        self.depth_intrinsics = self.pipeline_profile.get_stream(rs.stream.depth).as_video_stream_profile().get_intrinsics()
+        print(f"Stream profile '{self.profile.name}': color {self.profile.color_width}x{self.profile.color_height}, "
+              f"depth {self.profile.depth_width}x{self.profile.depth_height} @ {self.profile.fps} fps")
+
+    def wait_for_frames(self, timeout_ms=5000):
+        frames = self.pipeline.wait_for_frames(timeout_ms=timeout_ms)
+        # Timed from frame arrival, so waiting for the camera is not counted
+        with self.health_metrics.measure("depth_processing"):
+            frames = self.post_processor.process(frames)  # Filter depth once, before alignment and any consumer
+            self._track_depth_profile(frames.get_depth_frame())
+            if self.align is None:
+                return frames.get_color_frame(), frames.get_depth_frame(), frames.get_infrared_frame()
+            aligned_frames = self.align.process(frames)
+            return aligned_frames.get_color_frame(), aligned_frames.get_depth_frame(), frames.get_infrared_frame()
+
+    def _track_depth_profile(self, depth_frame):
+        if not depth_frame:
+            return
+        if (depth_frame.get_width(), depth_frame.get_height()) != (self.depth_intrinsics.width, self.depth_intrinsics.height):
+            self.depth_intrinsics = depth_frame.get_profile().as_video_stream_profile().get_intrinsics()
+            self._depth_profile_changed = True
+
+    def depth_profile_changed(self):
+        changed = self._depth_profile_changed
+        self._depth_profile_changed = False
+        return changed
+
+    def get_depth_intrinsics(self):
+        """Retrieve depth intrinsics (necessary for 2D to 3D projection) of the filtered depth stream."""
+        return self.depth_intrinsics
+
+    def get_color_intrinsics(self):
+        color_stream = self.pipeline_profile.get_stream(rs.stream.color)
+        return color_stream.as_video_stream_profile().get_intrinsics()
+
+    def get_depth_scale(self):
+        """Retrieve the depth scale for converting depth values to meters."""
+        return self.pipeline_profile.get_device().first_depth_sensor().get_depth_scale()
+
+    def get_depth_to_color_extrinsics(self):
+        depth_stream = self.pipeline_profile.get_stream(rs.stream.depth)
+        return depth_stream.get_extrinsics_to(self.pipeline_profile.get_stream(rs.stream.color))
+
+    def is_aligned(self):
+        return self.align is not None
+
+    def stop(self):
+        try:
+            self.pipeline.stop()
+        except RuntimeError:
+            pass  # Ignore errors if already stopped
+
+
+def intrinsics_to_dict(intrinsics):
+    """Serialize an rs.intrinsics object to plain JSON types."""
+    return {
+        "width": intrinsics.width,
+        "height": intrinsics.height,
+        "ppx": intrinsics.ppx,
+        "ppy": intrinsics.ppy,
+        "fx": intrinsics.fx,
+        "fy": intrinsics.fy,
+        "model": int(intrinsics.model),
+        "coeffs": list(intrinsics.coeffs),
+    }
+
+
+def extrinsics_to_dict(extrinsics):
+    """Serialize an rs.extrinsics object to plain JSON types."""
+    return {"rotation": list(extrinsics.rotation), "translation": list(extrinsics.translation)}
+
+
+def extrinsics_from_dict(data):
+    """Rebuild an rs.extrinsics object from `extrinsics_to_dict` output."""
+    extrinsics = rs.extrinsics()
+    extrinsics.rotation = data["rotation"]
+    extrinsics.translation = data["translation"]
+    return extrinsics
+
+
+def intrinsics_from_dict(data):
+    """Rebuild an rs.intrinsics object from `intrinsics_to_dict` output."""
+    intrinsics = rs.intrinsics()
+    intrinsics.width = data["width"]
+    intrinsics.height = data["height"]
+    intrinsics.ppx = data["ppx"]
+    intrinsics.ppy = data["ppy"]
+    intrinsics.fx = data["fx"]
+    intrinsics.fy = data["fy"]
+    intrinsics.model = rs.distortion(data["model"])
+    intrinsics.coeffs = data["coeffs"]
+    return intrinsics
+
+
+class RecordingFrameSource(FrameSource):
+    """Pass-through source that records every delivered frameset to a session directory.
+
+    Frames are buffered into chunks of `chunk_frames` and written by a background
+    thread so the capture loop only pays for one copy per frame. If the writer
+    falls more than a few chunks behind, capture waits rather than dropping frames,
+    keeping recordings complete for repeatable runs.
+
+    The session's calibration is read once when recording starts, and `session.json`
+    is written right away and rewritten after every chunk reaches disk. The index
+    therefore only lists complete chunks and survives a crash, a kill or a camera
+    that disappears before `stop()`.
+
+    When the wrapped source reports a depth profile change, the chunk in progress is
+    closed so every chunk holds frames of one depth resolution, and the change is
+    passed on to the caller.
+
+    Uncompressed chunks cost about 2.4 MB per 848x480 frame (color, depth and
+    infrared), roughly 146 MB/s at 60 fps. With `compress` the chunks are written
+    with `np.savez_compressed`; depth and infrared compress well, at the price of
+    CPU time in the writer thread.
+    """
+
+    def __init__(self, source, path, chunk_frames=120, compress=False):
+        self.source = source
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.compress = compress
+        self._chunk = {"color": [], "depth": [], "infrared": [], "timestamps": []}
+        self._chunk_depth_intrinsics = None  # Depth intrinsics of the frames in the current chunk
+        self._chunks_queued = 0  # Chunks handed to the writer, which names the next file
+        self._chunk_index = []  # Chunks on disk; only the writer thread appends
+        self._session = None  # Calibration read at start, so session.json never needs the device
+        self._depth_profile_changed = False
+        self._write_queue = queue.Queue(maxsize=4)
+        self._writer_thread = None
+
+    def start(self):
+        self.source.start()
+        os.makedirs(self.path, exist_ok=True)
+        self._session = {
+            "depth_intrinsics": intrinsics_to_dict(self.source.get_depth_intrinsics()),
+            "color_intrinsics": intrinsics_to_dict(self.source.get_color_intrinsics()),
+            "depth_scale": self.source.get_depth_scale(),
+            "depth_to_color": extrinsics_to_dict(self.source.get_depth_to_color_extrinsics()),
+            "aligned": self.source.is_aligned(),
+        }
+        self._write_session_file()
+        self._writer_thread = threading.Thread(target=self._write_chunks, daemon=True)
+        self._writer_thread.start()
+
+    def wait_for_frames(self, timeout_ms=5000):
+        color_frame, depth_frame, infrared_frame = self.source.wait_for_frames(timeout_ms)
+        if self.source.depth_profile_changed():
+            self._flush_chunk()  # Frames of different depth sizes cannot be stacked into one chunk
+            self._depth_profile_changed = True
+        if color_frame and depth_frame and infrared_frame:
+            if not self._chunk["timestamps"]:
+                self._chunk_depth_intrinsics = intrinsics_to_dict(self.source.get_depth_intrinsics())
+            self._chunk["color"].append(np.array(color_frame.get_data()))
+            self._chunk["depth"].append(np.array(depth_frame.get_data()))
+            self._chunk["infrared"].append(np.array(infrared_frame.get_data()))
+            self._chunk["timestamps"].append(depth_frame.get_timestamp())
+            if len(self._chunk["timestamps"]) >= self.chunk_frames:
+                self._flush_chunk()
+        return color_frame, depth_frame, infrared_frame
+
+    def _flush_chunk(self):
+        if not self._chunk["timestamps"]:
+            return
+        entry = {
+            "file": f"chunk_{self._chunks_queued:05d}.npz",
+            "frames": len(self._chunk["timestamps"]),
+            "depth_intrinsics": self._chunk_depth_intrinsics,
+        }
+        arrays = {key: np.stack(values) for key, values in self._chunk.items()}
+        self._write_queue.put((entry, arrays))
+        self._chunks_queued += 1
+        self._chunk = {key: [] for key in self._chunk}
+
+    def _write_chunks(self):
+        save = np.savez_compressed if self.compress else np.savez
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                break
+            entry, arrays = item
+            save(os.path.join(self.path, entry["file"]), **arrays)
+            self._chunk_index.append(entry)
+            self._write_session_file()  # Index the chunk only once it is complete on disk
+
+    def _write_session_file(self):
+        session = dict(self._session, chunks=self._chunk_index)
+        # Top-level depth intrinsics describe the first chunk; later chunks may differ
+        if self._chunk_index:
+            session["depth_intrinsics"] = self._chunk_index[0]["depth_intrinsics"]
+        # Write beside and swap in, so an interrupted write never leaves a truncated index
+        session_path = os.path.join(self.path, SESSION_FILE)
+        with open(session_path + ".tmp", "w") as f:
+            json.dump(session, f, indent=4)
+        os.replace(session_path + ".tmp", session_path)
+
+    def get_depth_intrinsics(self):
+        return self.source.get_depth_intrinsics()
+
+    def get_color_intrinsics(self):
+        return self.source.get_color_intrinsics()
+
+    def get_depth_scale(self):
+        return self.source.get_depth_scale()
+
+    def get_depth_to_color_extrinsics(self):
+        return self.source.get_depth_to_color_extrinsics()
+
+    def is_aligned(self):
+        return self.source.is_aligned()
+
+    def depth_profile_changed(self):
+        # The wrapped source's flag is consumed in wait_for_frames to close the chunk
+        changed = self._depth_profile_changed
+        self._depth_profile_changed = False
+        return changed
+
+    def stop(self):
+        if self._writer_thread is None:
+            return
+        self._flush_chunk()
+        self._write_queue.put(None)
+        self._writer_thread.join()  # The writer has indexed every chunk once it returns
+        self._writer_thread = None
+        self.source.stop()
+        print(f"Recorded {sum(c['frames'] for c in self._chunk_index)} frames to {self.path}")
+
+
+class PlaybackFrameSource(FrameSource):
+    """Replays a recorded session, paced by the recorded timestamps or as fast as possible.
+
+    Chunks recorded with their own depth intrinsics switch the delivered depth
+    profile when they are reached, reported through `depth_profile_changed()`.
+    """
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        with open(os.path.join(path, SESSION_FILE), "r") as f:
+            self.session = json.load(f)
+        self.depth_intrinsics = intrinsics_from_dict(self.session["depth_intrinsics"])
+        self._depth_intrinsics_data = self.session["depth_intrinsics"]
+        self._depth_profile_changed = False
+        self.color_intrinsics = intrinsics_from_dict(self.session["color_intrinsics"])
+        self.depth_scale = self.session["depth_scale"]
+        self.depth_to_color = extrinsics_from_dict(self.session["depth_to_color"])
+        self.aligned = self.session["aligned"]
+        self._chunk_number = 0
+        self._chunk = None
+        self._frame_in_chunk = 0
+        self._frame_number = 0
+        self._first_timestamp = None
+        self._start_time = None
+
+    def start(self):
+        if not self.session["chunks"]:
+            raise RuntimeError(f"Recorded session {self.path} contains no frames")
+        self._start_time = time.perf_counter()
+
+    def _load_next_chunk(self):
+        if self._chunk_number >= len(self.session["chunks"]):
+            if not self.loop:
+                raise RuntimeError("End of recorded session")
+            self._chunk_number = 0
+            self._first_timestamp = None  # Restart pacing from the top of the recording
+        entry = self.session["chunks"][self._chunk_number]
+        # Sessions recorded before per-chunk intrinsics use the top-level ones throughout
+        depth_intrinsics = entry.get("depth_intrinsics") or self.session["depth_intrinsics"]
+        if depth_intrinsics != self._depth_intrinsics_data:
+            self.depth_intrinsics = intrinsics_from_dict(depth_intrinsics)
+            self._depth_intrinsics_data = depth_intrinsics
+            self._depth_profile_changed = True
+        with np.load(os.path.join(self.path, entry["file"])) as data:
+            self._chunk = {key: data[key] for key in data.files}
+        self._chunk_number += 1
+        self._frame_in_chunk = 0
+
+    def wait_for_frames(self, timeout_ms=5000):
+        if self._chunk is None or self._frame_in_chunk >= len(self._chunk["timestamps"]):
+            self._load_next_chunk()
+        i = self._frame_in_chunk
+        self._frame_in_chunk += 1
+        self._frame_number += 1
+        timestamp = float(self._chunk["timestamps"][i])
+
+        if self.realtime:
+            if self._first_timestamp is None:
+                self._first_timestamp = timestamp
+                self._start_time = time.perf_counter()
+            delay = (timestamp - self._first_timestamp) / 1000.0 - (time.perf_counter() - self._start_time)
+            if delay > 0:
+                time.sleep(delay)
+
+        return (
+            ArrayFrame(self._chunk["color"][i], timestamp, self._frame_number),
+            ArrayFrame(self._chunk["depth"][i], timestamp, self._frame_number),
+            ArrayFrame(self._chunk["infrared"][i], timestamp, self._frame_number),
+        )
+
+    def depth_profile_changed(self):
+        changed = self._depth_profile_changed
+        self._depth_profile_changed = False
+        return changed
+
+    def get_depth_intrinsics(self):
+        return self.depth_intrinsics
+
+    def get_color_intrinsics(self):
+        return self.color_intrinsics
+
+    def get_depth_scale(self):
+        return self.depth_scale
+
+    def get_depth_to_color_extrinsics(self):
+        return self.depth_to_color
+
+    def is_aligned(self):
+        return self.aligned
+
+    def stop(self):
+        if self._start_time is None:
+            return
+        elapsed = time.perf_counter() - self._start_time
+        if elapsed > 0 and self._frame_number:
+            print(f"Played {self._frame_number} frames in {elapsed:.1f}s ({self._frame_number / elapsed:.1f} fps)")
+        self._start_time = None
@@ -1,106 +1,83 @@
 import time
-import pyrealsense2 as rs
 import numpy as np
-from transformation_utils import apply_dynamic_transformation
+from transformation_utils import build_transform_matrix
 from cube_utils.cube_manager import CubeManager  # Import the singleton instance
 from live_config import LiveConfig
 from detection_data import DetectionData
-
-previous_movement_points = {}
-
-def get_average_depth(depth_image, x, y, depth_scale, window_size=5):
-    """Calculate the average depth around a pixel."""
-    half_size = window_size // 2
-    x_min = max(0, x - half_size)
-    x_max = min(depth_image.shape[1], x + half_size + 1)
-    y_min = max(0, y - half_size)
-    y_max = min(depth_image.shape[0], y + half_size + 1)
-    depth_window = depth_image[y_min:y_max, x_min:x_max]
-    depth_values = depth_window.flatten()
-    valid_depths = depth_values[depth_values > 0]
-    if len(valid_depths) == 0:
-        return 0  # No valid depth in the window
-    return np.mean(valid_depths) * depth_scale
-
-def smooth_point(new_point, previous_point):
-    live_config = LiveConfig.get_instance()
-    alpha = live_config.headpoint_smoothing
-    if previous_point is None:
-        return new_point
-    if new_point is None:
-        return previous_point
-    return alpha * previous_point + (1 - alpha) * new_point
-def compute_object_points(tracked_objects, intrinsics, depth_image, depth_scale, rotation, translation, alpha=0.8):
-    global previous_movement_points
-
-    def is_valid_depth(x, y, depth_image):
-        return 0 <= x < depth_image.shape[1] and 0 <= y < depth_image.shape[0]
-
-    def get_3d_point(x, y, depth_value):
-        x3d, y3d, z3d = rs.rs2_deproject_pixel_to_point(intrinsics, [x, y], depth_value)
-        point = np.array([x3d, -y3d, -z3d], dtype=np.float32)  # Flip coordinates for consistency
-        return point
-
-    def is_within_thresholds(point, thresholds):
-        x_min, x_max, y_min, y_max, z_min, z_max = thresholds
-        return (
-            x_min <= point[0] <= x_max and
-            y_min <= point[1] <= y_max and
-            z_min <= point[2] <= z_max
-        )
-
-    def update_previous_points(obj_id, transformed_point):
-        smoothed_point = smooth_point(transformed_point, previous_movement_points.get(obj_id, transformed_point))
-        previous_movement_points[obj_id] = smoothed_point
-        return smoothed_point
-
-    # Retrieve configuration and thresholds
-    live_config = LiveConfig.get_instance()
-    thresholds = (
-        live_config.x_threshold_min, live_config.x_threshold_max,
-        live_config.y_threshold_min, live_config.y_threshold_max,
-        live_config.z_threshold_min, live_config.z_threshold_max
-    )
-
-    movement_points_transformed = {}
-    objects_outside_thresholds = []
-    cube_manager = CubeManager.get_instance()
-
-    depth_image = np.fliplr(depth_image)  # Flip depth image horizontally
-
+from depth_stats import DepthWindowStats
+from track_smoothing import TrackSmoother
+
+# Camera to head-point space: y points up and z away from the viewer, x is already mirrored
+HEADPOINT_AXIS_FLIPS = (1.0, -1.0, -1.0)
+
+# Smoothing state of every live track, updated for all head points at once
+head_point_smoother = TrackSmoother()
+
+def compute_object_points(tracked_objects, calibration, depth_image, rotation, translation, alpha=0.8, depth_stats=None,
+                          timestamp=None):
+    """Head points for tracked objects; `depth_image` is mirrored to match the display image.
+
+    Each peak's depth is the mean valid depth in a `headpoint_depth_window` square
+    around it, read from `depth_stats` (summed-area tables of `depth_image`, built
+    here if not given). All peaks are then deprojected, transformed and tested
+    against the thresholds and exclusion cubes as one batch, and the kept points
+    are smoothed per track by `head_point_smoother` (`timestamp` in seconds,
+    monotonic clock if None). Returns {track id: smoothed (3,) point} for the
+    objects inside the thresholds and outside every cube.
+    """
+
+    depth_rays = calibration.depth_image_rays  # Matches the delivered depth image's resolution and geometry
+    depth_scale = calibration.depth_scale
+    height, width = depth_image.shape[:2]
+
+    # Gather every peak inside the depth image; depth pixels differ from display pixels when unaligned
+    obj_ids, xs, ys = [], [], []
     for tracked_object in tracked_objects:
-        obj_id = tracked_object['id']
-        peak = tracked_object.get('peak')
-
+        peak = tracked_object.get('depth_peak') or tracked_object.get('peak')
         if not peak:
             continue
-
         x_peak, y_peak = peak
-        if not is_valid_depth(x_peak, y_peak, depth_image):
-            continue
-
-        depth_value = depth_image[int(y_peak), int(x_peak)] * depth_scale
-        if depth_value <= 0:
-            continue
+        if 0 <= x_peak < width and 0 <= y_peak < height:
+            obj_ids.append(tracked_object['id'])
+            xs.append(int(x_peak))
+            ys.append(int(y_peak))
 
-        point_3d = get_3d_point(x_peak, y_peak, depth_value)
-        point_3d_transformed = apply_dynamic_transformation([point_3d], rotation, translation)
-
-        if cube_manager.is_point_in_cubes(point_3d_transformed):
-            objects_outside_thresholds.append(obj_id)
-            continue
+    movement_points_transformed = {}
+    objects_outside_thresholds = []
 
-        if is_within_thresholds(point_3d_transformed, thresholds):
-            movement_points_transformed[obj_id] = update_previous_points(obj_id, point_3d_transformed)
+    live_config = LiveConfig.get_instance()
+    if obj_ids:
+        xs = np.array(xs, dtype=np.intp)
+        ys = np.array(ys, dtype=np.intp)
+        window = int(live_config.headpoint_depth_window)
+        if window > 1:
+            # Averaging over the window rides over depth holes and edges at the peak
+            if depth_stats is None:
+                depth_stats = DepthWindowStats(depth_image)
+            depths = (depth_stats.window_mean(xs, ys, window // 2) * depth_scale).astype(np.float32)
         else:
-            objects_outside_thresholds.append(obj_id)
-
-    # Clean up outdated movement points
-    previous_movement_points = {
-        obj_id: point
-        for obj_id, point in previous_movement_points.items()
-        if obj_id in movement_points_transformed
-    }
+            depths = depth_image[ys, xs] * np.float32(depth_scale)
+        has_depth = depths > 0
+
+        # Precomputed rays replace rs2_deproject_pixel_to_point; the y/z flips ride in the transform matrix
+        points = depth_rays.deproject(xs, ys, depths)
+        matrix = build_transform_matrix(rotation, translation, axis_flips=HEADPOINT_AXIS_FLIPS)
+        points_transformed = points @ matrix[:3, :3].T + matrix[:3, 3]
+
+        lower = np.array([live_config.x_threshold_min, live_config.y_threshold_min, live_config.z_threshold_min])
+        upper = np.array([live_config.x_threshold_max, live_config.y_threshold_max, live_config.z_threshold_max])
+        in_cubes = CubeManager.get_instance().points_in_cubes(points_transformed)
+        in_thresholds = np.all((points_transformed >= lower) & (points_transformed <= upper), axis=1)
+        keep = in_thresholds & ~in_cubes
+
+        kept = np.flatnonzero(has_depth & keep)
+        kept_ids = [obj_ids[i] for i in kept]
+        smoothed = head_point_smoother.update(kept_ids, points_transformed[kept], timestamp)
+        movement_points_transformed = dict(zip(kept_ids, smoothed))
+        objects_outside_thresholds = [obj_ids[i] for i in np.flatnonzero(has_depth & ~keep)]
+
+    # Tracks that left (or were excluded) start fresh if they come back
+    head_point_smoother.retain(movement_points_transformed)
 
     DetectionData().set_objects_outside_thresholds(objects_outside_thresholds)
     return movement_points_transformed
@@ -0,0 +1,145 @@
+"""
+Shared registry of backend health metrics.
+
+The capture thread and the processing stages record into a single HealthMetrics
+instance; the health server reads consistent snapshots of it and pushes them to
+subscribers. Recording is cheap (a lock, a deque append or an EMA update) so it
+can sit on the per-frame path.
+
+Example:
+    metrics = HealthMetrics()
+    with metrics.measure("detection"):
+        tracked_objects = detector.detect_objects(...)
+    metrics.snapshot()  # {"camera": "connected", "capture_fps": 59.8, ...}
+
+Worker stages also report each frameset's outcome with `record_success` or
+`record_error`, so a monitor can tell a stage that keeps failing (or has stopped
+producing results) from one that is merely slow.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from detection_data import DetectionData
+
+FPS_WINDOW = 2.0  # Seconds of frame arrivals used for the capture rate
+LATENCY_SMOOTHING = 0.9  # EMA weight of the previous latency value
+
+
+class HealthMetrics:
+    _instance = None
+    _lock = threading.Lock()  # Lock to ensure thread safety for singleton
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance.init_data()
+        return cls._instance
+
+    def init_data(self):
+        self.camera_state = "starting"  # "starting", "connected" or "disconnected"
+        self.frame_seq = 0
+        self.frame_times = deque(maxlen=512)  # Monotonic arrival times of recent framesets
+        self.latencies = {}  # Stage name -> smoothed latency in seconds
+        self.stages = {}  # Worker stage name -> outcome counters, see record_success/record_error
+        self.detection_data = DetectionData()
+        self.frame_stats_source = None  # Callable returning per-consumer frame delivery counters
+        self.lock = threading.Lock()
+
+    def set_camera_state(self, state):
+        with self.lock:
+            self.camera_state = state
+
+    def set_frame_stats_source(self, source):
+        """Report `source()` (e.g. LatestFrameSlot.subscription_stats) as "frame_consumers" in snapshots."""
+        with self.lock:
+            self.frame_stats_source = source
+
+    def record_frame(self, seq, now=None):
+        """Note the arrival of a published frameset."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.frame_seq = seq
+            self.frame_times.append(now)
+
+    def record_latency(self, stage, seconds):
+        with self.lock:
+            previous = self.latencies.get(stage)
+            if previous is None:
+                self.latencies[stage] = seconds
+            else:
+                self.latencies[stage] = LATENCY_SMOOTHING * previous + (1 - LATENCY_SMOOTHING) * seconds
+
+    def _stage(self, stage):
+        # Caller holds the lock
+        if stage not in self.stages:
+            self.stages[stage] = {"last_success": None, "errors": 0, "failing": False, "last_error": None}
+        return self.stages[stage]
+
+    def record_success(self, stage, now=None):
+        """Note that `stage` finished a frameset."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            status = self._stage(stage)
+            status["last_success"] = now
+            status["failing"] = False
+
+    def record_error(self, stage, error):
+        """Note that `stage` failed on a frameset with `error`."""
+        with self.lock:
+            status = self._stage(stage)
+            status["errors"] += 1
+            status["failing"] = True
+            status["last_error"] = f"{type(error).__name__}: {error}"
+
+    @contextmanager
+    def measure(self, stage):
+        """Time the enclosed block and record it as `stage` latency."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_latency(stage, time.perf_counter() - start)
+
+    def capture_fps(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            return self._capture_fps(now)
+
+    def _capture_fps(self, now):
+        recent = [t for t in self.frame_times if now - t <= FPS_WINDOW]
+        if len(recent) < 2 or recent[-1] == recent[0]:
+            return 0.0
+        return (len(recent) - 1) / (recent[-1] - recent[0])
+
+    def snapshot(self):
+        """Consistent, JSON-serialisable view of the current health state."""
+        active_movement_id = self.detection_data.get_active_movement_id()
+        frame_stats_source = self.frame_stats_source
+        # The frame slot has its own lock, so its counters are read outside ours
+        frame_consumers = frame_stats_source() if frame_stats_source is not None else {}
+        now = time.monotonic()
+        with self.lock:
+            return {
+                "camera": self.camera_state,
+                "capture_fps": round(self._capture_fps(now), 1),
+                "frame_seq": self.frame_seq,
+                "latency_ms": {stage: round(value * 1000.0, 2) for stage, value in self.latencies.items()},
+                "frame_consumers": frame_consumers,
+                # Seconds since the stage last finished a frameset; grows while it fails or stalls
+                "stages": {
+                    stage: {
+                        "failing": status["failing"],
+                        "errors": status["errors"],
+                        "last_error": status["last_error"],
+                        "since_success_s": (
+                            None if status["last_success"] is None else round(now - status["last_success"], 2)
+                        ),
+                    }
+                    for stage, status in self.stages.items()
+                },
+                "active_movement_id": active_movement_id,
+                "time": time.time(),
+            }
@@ -0,0 +1,147 @@
+"""
+Push-based health endpoint for the frontend and monitoring tools.
+
+Subscribers open one TCP connection and keep it. The server pushes a status
+frame, one JSON object per line, as soon as a client connects, again whenever
+the camera state, the active movement or the set of failing stages changes,
+and otherwise every `interval` seconds:
+
+    {"camera": "connected", "capture_fps": 59.8, "frame_seq": 1234,
+     "latency_ms": {"depth_processing": 3.1, "capture": 0.4, "detection": 21.7, ...},
+     "frame_consumers": {"detection": {"delivered": 980, "dropped": 254, ...}, ...},
+     "stages": {"detection": {"failing": false, "errors": 0, "since_success_s": 0.03, ...}, ...},
+     "active_movement_id": 3, "time": 1718000000.0}
+
+The server runs its own asyncio event loop on a daemon thread, so it never
+blocks capture or the GUI, and `stop()` shuts it down without a self-connect.
+"""
+
+import asyncio
+import json
+import threading
+from health_metrics import HealthMetrics
+
+STATUS_INTERVAL = 0.5  # Seconds between periodic status frames
+CHANGE_POLL_INTERVAL = 0.05  # Seconds between checks for camera or active movement changes
+MAX_CLIENT_BACKLOG = 64 * 1024  # Bytes queued for a client before it is dropped as stalled
+
+
+def _json_default(value):
+    # numpy scalars (tracker ids, depth values) serialise as plain numbers
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class HealthServer:
+    """Asyncio TCP server pushing HealthMetrics snapshots to persistent subscribers."""
+
+    def __init__(self, host="localhost", port=12345, metrics=None, interval=STATUS_INTERVAL):
+        self.host = host
+        self.port = port
+        self.metrics = metrics if metrics is not None else HealthMetrics()
+        self.interval = interval
+        self.clients = set()
+        self.handlers = set()  # Per-client tasks, awaited on shutdown
+        self.loop = None
+        self.thread = None
+        self._stop_event = None
+        self._stopping = False
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Close all subscriber connections and the listening socket."""
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._request_stop)
+        except RuntimeError:
+            return  # Loop already shut down
+        if threading.current_thread() is not self.thread:
+            self.thread.join(timeout=1.0)
+
+    def _request_stop(self):
+        self._stopping = True  # Seen by _serve if it has not started yet
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._serve())
+        except Exception as e:
+            print(f"Health server error: {e}")
+        finally:
+            self.loop.close()
+
+    async def _serve(self):
+        self._stop_event = asyncio.Event()
+        if self._stopping:
+            return
+        server = await asyncio.start_server(self._handle_client, self.host, self.port, reuse_address=True)
+        print(f"Health server running at {self.host}:{self.port}...")
+
+        publisher = asyncio.ensure_future(self._publish_loop())
+        try:
+            await self._stop_event.wait()
+        finally:
+            publisher.cancel()
+            self._broadcast(self._encode(self.metrics.snapshot()))  # Final state, e.g. a camera disconnect
+            server.close()
+            for writer in list(self.clients):
+                writer.close()
+            await asyncio.gather(*self.handlers, return_exceptions=True)
+            await server.wait_closed()
+
+    async def _handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        self.clients.add(writer)
+        try:
+            self._send(writer, self._encode(self.metrics.snapshot()))  # Current state right away
+            # Subscribers do not send anything; reading only detects when they hang up
+            while await reader.read(1024):
+                pass
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            self.handlers.discard(task)
+            writer.close()
+
+    async def _publish_loop(self):
+        last_key = None
+        last_sent = 0.0
+        while True:
+            await asyncio.sleep(CHANGE_POLL_INTERVAL)
+            snapshot = self.metrics.snapshot()
+            failing = tuple(sorted(stage for stage, status in snapshot["stages"].items() if status["failing"]))
+            key = (snapshot["camera"], snapshot["active_movement_id"], failing)
+            now = self.loop.time()
+            if key != last_key or now - last_sent >= self.interval:
+                self._broadcast(self._encode(snapshot))
+                last_key = key
+                last_sent = now
+
+    def _broadcast(self, line):
+        for writer in list(self.clients):
+            self._send(writer, line)
+
+    def _send(self, writer, line):
+        if writer.is_closing():
+            self.clients.discard(writer)
+            return
+        if writer.transport.get_write_buffer_size() > MAX_CLIENT_BACKLOG:
+            # A subscriber that stopped reading must not grow our buffers without bound
+            self.clients.discard(writer)
+            writer.close()
+            return
+        writer.write(line)
+
+    @staticmethod
+    def _encode(snapshot):
+        return (json.dumps(snapshot, default=_json_default) + "\n").encode()
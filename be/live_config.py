@@ -108,8 +108,19 @@ class LiveConfig:
         self.conf_thres = 0.1
         self.stationary_timeout = 20
         self.roi_filter_dur = 10
-        self.headpoint_smoothing = 0.5
+        self.headpoint_smoothing = 0.5  # EMA weight of the previous head point
+        self.headpoint_filter = "ema"  # Head-point smoothing: "ema", "one_euro" or "kalman", see track_smoothing.py
+        self.one_euro_min_cutoff = 1.0  # Hz; lower smooths a still head more
+        self.one_euro_beta = 0.7  # Cutoff increase per m/s of head speed; higher lags less when moving
+        self.one_euro_d_cutoff = 1.0  # Hz; low-pass on the speed estimate
+        self.kalman_process_noise = 4.0  # Acceleration variance (m^2/s^4); higher follows faster
+        self.kalman_measurement_noise = 0.0025  # Head-point position variance (m^2)
+        self.headpoint_depth_window = 5  # Side in pixels of the window whose valid depth is averaged at a head peak (1 = peak pixel only)
         self.point_size = 1
+        self.voxel_lod = False  # Draw one point per voxel (centroid, mean color) instead of every pixel
+        self.voxel_size = 0.02  # Voxel edge length in meters for the level-of-detail view
+        self.point_half_precision = False  # Stage and upload viewer positions/texcoords as float16
+        self.shader_crop = True  # Transform and threshold-crop the viewer's cloud in a shader (CPU fallback if False)
         self.num_divisions = 40
         self.history = 1000
         self.varthreshold = 30
@@ -130,6 +141,32 @@ class LiveConfig:
         self.detect_people = True
         self.detect_objects = True
 
+        # Capture settings
+        self.align_depth_to_color = True  # False maps only the needed pixels instead of aligning every frame
+        self.stream_profile = "full"  # Name of the camera stream profile, see stream_profiles.py
+        self.stream_profiles = {}  # Extra or overriding profiles: name -> resolutions and fps
+
+        # Depth post-processing, run once per frame in the capture thread before alignment
+        self.depth_decimation = False
+        self.depth_decimation_magnitude = 2  # Divides the depth resolution by this factor
+        self.depth_spatial = False
+        self.depth_spatial_magnitude = 2
+        self.depth_spatial_alpha = 0.5
+        self.depth_spatial_delta = 20
+        self.depth_temporal = False
+        self.depth_temporal_alpha = 0.4
+        self.depth_temporal_delta = 20
+        self.depth_temporal_persistence = 3  # librealsense persistence mode, 0-8
+        self.depth_hole_filling = False
+        self.depth_hole_filling_mode = 1  # 0 fill from left, 1 farthest from around, 2 nearest from around
+
+        # Low-light switching to infrared (brightness is mean luma, 0-255)
+        self.dark_enter_brightness = 90
+        self.dark_exit_brightness = 110
+        self.dark_min_dwell = 5.0  # Seconds to hold a mode before switching again
+        self.brightness_sample_interval = 10  # Estimate brightness every Nth frame
+        self.brightness_sample_stride = 8  # Sample every Nth pixel in both directions
+
         # Frontend settings
         self.min_blink_interval = 3.0
         self.max_blink_interval = 8.0
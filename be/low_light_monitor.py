@@ -0,0 +1,52 @@
+import time
+import numpy as np
+from live_config import LiveConfig
+
+# ITU-R BT.601 luma weights in the camera's BGR channel order
+BGR_LUMA_WEIGHTS = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+def estimate_brightness(color_image, stride):
+    """Approximate mean luma of a BGR image from a strided subsample."""
+    sample = color_image[::stride, ::stride]
+    return float(sample.reshape(-1, 3).mean(axis=0) @ BGR_LUMA_WEIGHTS)
+
+
+class LowLightMonitor:
+    """Decides when the capture path should swap color for infrared.
+
+    Brightness is only sampled every `brightness_sample_interval` frames on a
+    strided grid. Switching uses two thresholds (enter dark below
+    `dark_enter_brightness`, leave above `dark_exit_brightness`) and a minimum
+    dwell time, so dusk lighting hovering around one value cannot flap the mode
+    and force the background models to re-learn.
+    """
+
+    def __init__(self):
+        self.live_config = LiveConfig.get_instance()
+        self.is_dark = False
+        self.brightness = None
+        self._frame_count = 0
+        self._last_switch_time = None
+
+    def update(self, color_image, now=None):
+        """Feed the latest color image and return whether the scene counts as dark."""
+        self._frame_count += 1
+        interval = max(1, int(self.live_config.brightness_sample_interval))
+        if self.brightness is not None and self._frame_count % interval != 0:
+            return self.is_dark
+
+        stride = max(1, int(self.live_config.brightness_sample_stride))
+        self.brightness = estimate_brightness(color_image, stride)
+
+        now = time.monotonic() if now is None else now
+        if self._last_switch_time is not None and now - self._last_switch_time < self.live_config.dark_min_dwell:
+            return self.is_dark
+
+        if not self.is_dark and self.brightness < self.live_config.dark_enter_brightness:
+            self.is_dark = True
+            self._last_switch_time = now
+        elif self.is_dark and self.brightness > self.live_config.dark_exit_brightness:
+            self.is_dark = False
+            self._last_switch_time = now
+        return self.is_dark
@@ -0,0 +1,189 @@
+"""
+Head-point markers drawn from one cached low-poly sphere mesh.
+
+The sphere (a once-subdivided icosahedron, 80 triangles) is built once and kept
+in a vertex buffer. Every paint draws all markers with a single instanced call:
+the mesh is shared and each instance only carries its position and color (red
+for the active movement, green for the others). Marker cost is therefore the
+same for 2 or 30 tracked people, and nothing is allocated on the GL side per
+frame.
+
+If the instancing program cannot be built, each marker is drawn from the same
+cached buffer with its own translate and draw call.
+
+Example:
+    markers = MarkerRenderer()
+    markers.initialize()                           # In initializeGL
+    markers.draw(head_points, active_movement_id)  # In paintGL
+"""
+
+import ctypes
+import logging
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+from OpenGL.error import GLError
+
+MARKER_RADIUS = 0.07
+ACTIVE_COLOR = (1.0, 0.0, 0.0)
+INACTIVE_COLOR = (0.0, 1.0, 0.0)
+
+VERTEX_SHADER = """
+#version 120
+attribute vec3 position;  // Unit sphere vertex
+attribute vec3 offset;    // Per instance: head point
+attribute vec3 color;     // Per instance: active or inactive color
+uniform float radius;
+varying vec3 marker_color;
+
+void main() {
+    marker_color = color;
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(position * radius + offset, 1.0);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+varying vec3 marker_color;
+
+void main() {
+    gl_FragColor = vec4(marker_color, 1.0);
+}
+"""
+
+_logger = logging.getLogger(__name__)
+
+
+def icosphere(subdivisions=1):
+    """Unit sphere as an (N, 3) float32 triangle list, built by subdividing an icosahedron."""
+    t = (1.0 + 5 ** 0.5) / 2
+    vertices = [
+        (-1, t, 0), (1, t, 0), (-1, -t, 0), (1, -t, 0),
+        (0, -1, t), (0, 1, t), (0, -1, -t), (0, 1, -t),
+        (t, 0, -1), (t, 0, 1), (-t, 0, -1), (-t, 0, 1),
+    ]
+    faces = [
+        (0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11),
+        (1, 5, 9), (5, 11, 4), (11, 10, 2), (10, 7, 6), (7, 1, 8),
+        (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9),
+        (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1),
+    ]
+    triangles = np.array(vertices, dtype=np.float64)[np.array(faces)]  # (F, 3 corners, 3)
+    for _ in range(subdivisions):
+        a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+        ab, bc, ca = (a + b) / 2, (b + c) / 2, (c + a) / 2
+        triangles = np.concatenate([
+            np.stack([a, ab, ca], axis=1), np.stack([b, bc, ab], axis=1),
+            np.stack([c, ca, bc], axis=1), np.stack([ab, bc, ca], axis=1),
+        ])
+    triangles /= np.linalg.norm(triangles, axis=2, keepdims=True)  # Push every corner onto the unit sphere
+    return triangles.reshape(-1, 3).astype(np.float32)
+
+
+class MarkerRenderer:
+    """Draws all head-point markers as instances of one cached sphere mesh."""
+
+    def __init__(self, radius=MARKER_RADIUS, subdivisions=1):
+        self.radius = radius
+        self.mesh = icosphere(subdivisions)
+        self.mesh_buffer = None
+        self.instance_buffer = None
+        self.instance_capacity = 0  # Bytes allocated in the instance buffer
+        self.program = None
+        self.locations = {}
+
+    def initialize(self):
+        self.mesh_buffer, self.instance_buffer = glGenBuffers(2)
+        glBindBuffer(GL_ARRAY_BUFFER, self.mesh_buffer)
+        glBufferData(GL_ARRAY_BUFFER, self.mesh.nbytes, self.mesh, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        try:
+            if not bool(glDrawArraysInstanced) or not bool(glVertexAttribDivisor):
+                raise RuntimeError("instanced drawing not supported by this context")
+            self.program = shaders.compileProgram(
+                shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+                shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+            )
+        except (RuntimeError, GLError) as e:
+            _logger.warning(f"Instanced markers unavailable, drawing one call per marker: {e}")
+            self.program = None
+            return
+        for name in ("position", "offset", "color"):
+            self.locations[name] = glGetAttribLocation(self.program, name)
+        self.locations["radius"] = glGetUniformLocation(self.program, "radius")
+
+    def _instances(self, head_points, active_movement_id):
+        """(M, 6) float32 rows of position and color for every valid head point."""
+        rows = [
+            (*head_point, *(ACTIVE_COLOR if track_id == active_movement_id else INACTIVE_COLOR))
+            for track_id, head_point in head_points.items()
+            if head_point is not None
+        ]
+        return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+    def draw(self, head_points, active_movement_id):
+        if not head_points or self.mesh_buffer is None:
+            return
+        instances = self._instances(head_points, active_movement_id)
+        if len(instances) == 0:
+            return
+        if self.program is None:
+            self._draw_each(instances)
+            return
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_buffer)
+        if instances.nbytes > self.instance_capacity:
+            self.instance_capacity = max(instances.nbytes * 2, 64 * instances.strides[0])  # Room for 64 markers at first
+            glBufferData(GL_ARRAY_BUFFER, self.instance_capacity, None, GL_DYNAMIC_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, instances.nbytes, instances)
+
+        glUseProgram(self.program)
+        glUniform1f(self.locations["radius"], self.radius)
+        position, offset, color = self.locations["position"], self.locations["offset"], self.locations["color"]
+        stride = instances.strides[0]
+        glEnableVertexAttribArray(offset)
+        glVertexAttribPointer(offset, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glVertexAttribDivisor(offset, 1)
+        glEnableVertexAttribArray(color)
+        glVertexAttribPointer(color, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(3 * instances.itemsize))
+        glVertexAttribDivisor(color, 1)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.mesh_buffer)
+        glEnableVertexAttribArray(position)
+        glVertexAttribPointer(position, 3, GL_FLOAT, GL_FALSE, 0, None)
+
+        glDrawArraysInstanced(GL_TRIANGLES, 0, len(self.mesh), len(instances))
+
+        # Divisors are per attribute index and would leak into other draws
+        glVertexAttribDivisor(offset, 0)
+        glVertexAttribDivisor(color, 0)
+        glDisableVertexAttribArray(position)
+        glDisableVertexAttribArray(offset)
+        glDisableVertexAttribArray(color)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
+
+    def _draw_each(self, instances):
+        """Fallback without instancing: one draw per marker from the cached mesh."""
+        glBindBuffer(GL_ARRAY_BUFFER, self.mesh_buffer)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        for x, y, z, r, g, b in instances:
+            glColor3f(r, g, b)
+            glPushMatrix()
+            glTranslatef(x, y, z)
+            glScalef(self.radius, self.radius, self.radius)
+            glDrawArrays(GL_TRIANGLES, 0, len(self.mesh))
+            glPopMatrix()
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def release(self):
+        if self.mesh_buffer is not None:
+            glDeleteBuffers(2, [self.mesh_buffer, self.instance_buffer])
+            self.mesh_buffer = self.instance_buffer = None
+            self.instance_capacity = 0
+        if self.program is not None:
+            glDeleteProgram(self.program)
+            self.program = None
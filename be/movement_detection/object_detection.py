@@ -44,7 +44,12 @@ class ObjectDetector:
         )
         self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))  # For morphological operations
 
-    def detect_objects(self, display_image, depth_image, intrinsics, depth_scale):
+    def detect_objects(self, display_image, depth_image, calibration, is_dark=None):
+        # Both images arrive mirrored and read-only (shared through the FrameBundle)
+        # is_dark should be the frame's own flag (FrameBundle.is_dark): the live flag may
+        # already describe a newer frame than the one being detected on
+        if is_dark is None:
+            is_dark = self.detection_data.get_is_dark()
         # Initialize movement status dictionary if not already initialized
         if not hasattr(self, 'tracked_objects_movement_status'):
             self.tracked_objects_movement_status = {}
@@ -61,8 +66,11 @@ class ObjectDetector:
             # self.person_missing = False
             # self.person_gone = False
 
-        # Mirror the depth image to match the mirrored display image
-        depth_image = np.fliplr(depth_image)
+        # Unaligned depth needs boxes and peaks mapped between images; infrared already
+        # shares the depth camera's geometry, so dark frames map one to one
+        depth_mapping = None
+        if not calibration.aligned and not is_dark:
+            depth_mapping = calibration
 
         # Apply background subtraction on the full image
         fg_mask = self.bg_subtractor.apply(display_image)
@@ -151,7 +159,7 @@ class ObjectDetector:
                 if filter_to_roi:
                     if not self._is_within_roi(x1_bg, y1_bg, x2_bg, y2_bg, roi_coords):
                         continue  # Skip detections outside ROI
-                if self.live_config.detect_people and not self.detection_data._is_dark:
+                if self.live_config.detect_people and not is_dark:
 
                     is_near_yolo = False
                     for x1_yolo, y1_yolo, x2_yolo, y2_yolo in yolo_bbs:
@@ -281,7 +289,7 @@ class ObjectDetector:
                                 self.active_movement_last_seen_time = time.time()
                                 self.person_missing = False
                                 self.person_gone = False
-                            self._process_tracked_object(tracked_object, depth_image, tracked_bbs, is_yolo=True, is_moving=is_moving)
+                            self._process_tracked_object(tracked_object, depth_image, tracked_bbs, display_image.shape, depth_mapping, is_yolo=True, is_moving=is_moving)
                     elif movement_status == 'stopped':
                         # Remove the object from the tracker
                         tracked_object.hit_counter = 0  # Mark for deletion
@@ -307,7 +315,7 @@ class ObjectDetector:
                         self.active_movement_last_seen_time = time.time()
                         self.person_missing = False
                         self.person_gone = False
-                    self._process_tracked_object(tracked_object, depth_image, tracked_bbs, is_yolo=False, is_moving=is_moving)
+                    self._process_tracked_object(tracked_object, depth_image, tracked_bbs, display_image.shape, depth_mapping, is_yolo=False, is_moving=is_moving)
 
         # After processing all tracked_objects
         if not found_active_movement:
@@ -348,24 +356,33 @@ class ObjectDetector:
             # Update last_active_bb
             for tracked_object in yolo_tracked_objects + bgsub_tracked_objects:
                 if tracked_object.id == active_movement_id:
-                    x1, y1, x2, y2 = self._get_bounding_box(tracked_object, depth_image.shape)
+                    x1, y1, x2, y2 = self._get_bounding_box(tracked_object, display_image.shape)
                     self.last_active_bb = {'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2}
                     break
 
         return tracked_bbs
 
-    def _process_tracked_object(self, tracked_object, depth_image, tracked_bbs, is_yolo=False, is_moving=False):
+    def _process_tracked_object(self, tracked_object, depth_image, tracked_bbs, image_shape, depth_mapping=None, is_yolo=False, is_moving=False):
         center = np.array(tracked_object.estimate).flatten()  # Ensure 1D array
         x, y = int(center[0]), int(center[1])  # Extract scalar coordinates
 
         # Get bounding box size from detection data
-        x1, y1, x2, y2 = self._get_bounding_box(tracked_object, depth_image.shape)
+        x1, y1, x2, y2 = self._get_bounding_box(tracked_object, image_shape)
+
+        # Search the part of the depth image the box can cover (the box itself when aligned)
+        if depth_mapping is not None:
+            dx1, dy1, dx2, dy2 = self._color_box_to_depth_box(x1, y1, x2, y2, depth_mapping, image_shape, depth_image.shape)
+        else:
+            # Same pixel grid up to resolution (infrared display over depth aligned to color)
+            dx1, dy1 = self._rescale_pixel(x1, y1, image_shape, depth_image.shape)
+            dx2, dy2 = self._rescale_pixel(x2, y2, image_shape, depth_image.shape)
 
         # Extract depth region and handle invalid depth values
-        depth_region = depth_image[y1:y2, x1:x2]
+        depth_region = depth_image[dy1:dy2, dx1:dx2]
 
         # Find the peak (minimum depth value point)
         peak_2d = None
+        depth_peak = None
         if depth_region.size > 0:
             # Mask invalid depth values (0) with the maximum value in the valid depth region
             max_valid_depth = depth_region.max() if depth_region.max() > 0 else 1
@@ -373,8 +390,12 @@ class ObjectDetector:
 
             # Find the closest depth point in the region
             min_depth_index = np.unravel_index(np.argmin(depth_region_valid), depth_region.shape)
-            y_peak, x_peak = y1 + min_depth_index[0], x1 + min_depth_index[1]
-            peak_2d = (x_peak, y_peak)  # 2D peak point in pixel coordinates
+            y_peak, x_peak = dy1 + min_depth_index[0], dx1 + min_depth_index[1]
+            depth_peak = (x_peak, y_peak)  # Peak in depth image pixels
+            if depth_mapping is not None:
+                peak_2d = self._depth_pixel_to_color_pixel(x_peak, y_peak, depth_image[y_peak, x_peak], depth_mapping, image_shape, depth_image.shape)
+            else:
+                peak_2d = self._rescale_pixel(x_peak, y_peak, depth_image.shape, image_shape)  # 2D peak point in pixel coordinates
 
         # Append tracked object info with peak, movement status, and detection source
         tracked_bbs.append({
@@ -383,11 +404,38 @@ class ObjectDetector:
             "y1": y1,
             "x2": x2,
             "y2": y2,
-            "peak": peak_2d,  # 2D peak point
+            "peak": peak_2d,  # 2D peak point in display pixels
+            "depth_peak": depth_peak,  # Same peak in depth image pixels
             "is_moving": is_moving,  # Movement status
             "is_yolo": is_yolo  # Detection source
         })
 
+    def _color_box_to_depth_box(self, x1, y1, x2, y2, calibration, image_shape, depth_shape):
+        """Map a box in the mirrored display image to the mirrored depth image."""
+        color_w, depth_w = image_shape[1], depth_shape[1]
+        dx1, dy1, dx2, dy2 = calibration.color_box_to_depth_box(color_w - 1 - x2, y1, color_w - 1 - x1, y2)
+        return depth_w - 1 - dx2, dy1, depth_w - 1 - dx1, dy2
+
+    def _depth_pixel_to_color_pixel(self, x, y, depth_value, calibration, image_shape, depth_shape):
+        """Map a mirrored depth pixel to the mirrored display image, or None without valid depth."""
+        if depth_value == 0:
+            return None
+        color_w, depth_w = image_shape[1], depth_shape[1]
+        pixel = calibration.depth_pixels_to_color_pixels(
+            [depth_w - 1 - x], [y], [depth_value * calibration.depth_scale]
+        )[0]
+        u = int(np.clip(round(color_w - 1 - pixel[0]), 0, color_w - 1))
+        v = int(np.clip(round(pixel[1]), 0, image_shape[0] - 1))
+        return (u, v)
+
+    def _rescale_pixel(self, x, y, from_shape, to_shape):
+        """Map a pixel between images of the same view at different stream resolutions."""
+        if from_shape[:2] == to_shape[:2]:
+            return (x, y)
+        u = int(np.clip(x * to_shape[1] // from_shape[1], 0, to_shape[1] - 1))
+        v = int(np.clip(y * to_shape[0] // from_shape[0], 0, to_shape[0] - 1))
+        return (u, v)
+
     def _get_bounding_box(self, tracked_object, image_shape):
         center = np.array(tracked_object.estimate).flatten()
         x, y = int(center[0]), int(center[1])
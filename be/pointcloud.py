@@ -5,14 +5,23 @@ from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtOpenGL import QGLWidget
 from OpenGL.GL import *
 from OpenGL.GLU import *
-from pointcloud_drawing_utils import draw_vertical_dividers,draw_horizontal_dividers, draw_movement_points
-import cv2
+from pointcloud_drawing_utils import draw_vertical_dividers,draw_horizontal_dividers, fill_divider
+from pointcloud_renderer import PointCloudRenderer
+from pointcloud_shader import PointCloudShader
+from marker_renderer import MarkerRenderer
 from detection_data import DetectionData
-from transformation_utils import apply_dynamic_transformation
-from headpoint_utils import compute_object_points
-from active_movement_logic import update_active_movement
+from transformation_utils import CropTransform
+from voxel_grid import voxel_downsample
 from cube_utils.cube_manager import CubeManager
 from live_config import LiveConfig
+from frame_source import ArrayFrame
+from frame_slot import LATEST_ONLY
+from health_metrics import HealthMetrics
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
 
 class AppState:
 
@@ -21,7 +30,6 @@ class AppState:
         self.translation = np.array([0, 0, 0], dtype=np.float32)
         self.mouse_btns = [False, False, False]
         self.prev_mouse = 0, 0
-        self.decimate = 1
         self.scale = True
         self.color = True
         self.paused = False
@@ -35,30 +43,34 @@ import numpy as np
 
 
 class GLWidget(QGLWidget):
-    def __init__(self, rs_manager, parent=None):
+    def __init__(self, rs_manager, detection_service=None, parent=None):
         super(GLWidget, self).__init__(parent)
 
         self.setFocusPolicy(Qt.StrongFocus)  # Ensure GLWidget can capture key events
         self.setFocus()  # Set initial focus on the widget
 
         self.rs_manager = rs_manager
+        self.detection_service = detection_service  # Head points and active movement come from here; None draws no markers
         self.detection_data = DetectionData()  # Initialize detection data
         self.cube_manager = CubeManager.get_instance()
 
         # Processing blocks
-        self.pc = rs.pointcloud()
-        self.decimate = rs.decimation_filter()
-        self.decimate.set_option(rs.option.filter_magnitude, 2 ** state.decimate)
-        self.colorizer = rs.colorizer()
+        self.pc = rs.pointcloud()  # Depth arrives already post-processed by the capture thread
 
         # Timer for updating frames
         self.timer = QTimer()
         self.timer.timeout.connect(self.update)
         self.timer.start(30)  # Approximately 30 FPS
 
-        # Attributes for vertices and colors
-        self.vertices = None
-        self.colors = None
+        # Build the cloud once per captured frame; repaints in between reuse the last one
+        self.frame_subscription = self.rs_manager.subscribe_frames("pointcloud", LATEST_ONLY)
+        self.health_metrics = HealthMetrics()
+
+        # GPU-resident point cloud, refilled only when a new frame has been processed
+        self.renderer = PointCloudRenderer()
+        self.crop_transform = CropTransform()  # Cached transform matrix and reusable crop buffers
+        self.point_shader = PointCloudShader()  # Transform, threshold crop and point size on the GPU when available
+        self.marker_renderer = MarkerRenderer()  # Head points as instances of one cached sphere mesh
 
         # Instance of LiveConfig for live configuration settings
         self.live_config = LiveConfig.get_instance()
@@ -67,12 +79,38 @@ class GLWidget(QGLWidget):
         self.headpoints_transformed = None
         self.movement_points_transformed = None
         self.active_movement_id = None
-        self.active_movement_type = None
+
+        # Clouds are built on a worker thread; paintGL only uploads the newest one and draws
+        self.processing = True
+        self.worker_thread = threading.Thread(target=self._process_loop, daemon=True)
+        self.worker_thread.start()
+
+    def stop_processing(self):
+        """Stop the point cloud worker thread."""
+        self.processing = False
+        self.worker_thread.join(timeout=1.0)
+
+    def _process_loop(self):
+        """Build a point cloud for each new frameset until stopped."""
+        while self.processing:
+            frames = self.frame_subscription.wait_for_frames(timeout=0.1)
+            if frames is None or state.paused:
+                continue
+            try:
+                self._process_frames_and_vertices(frames)
+            except Exception as e:
+                _logger.exception(f"Point cloud failed on frameset {frames.seq}")
+                self.health_metrics.record_error("pointcloud", e)
+            else:
+                self.health_metrics.record_success("pointcloud")
 
     def initializeGL(self):
         glClearColor(0, 0, 0, 1)
         glEnable(GL_DEPTH_TEST)
         glPointSize(self.live_config.point_size)
+        self.renderer.initialize()
+        self.point_shader.initialize()
+        self.marker_renderer.initialize()
 
     def resizeGL(self, w, h):
         glViewport(0, 0, w, h)
@@ -84,10 +122,6 @@ class GLWidget(QGLWidget):
 
     def paintGL(self):
         self._prepare_opengl()
-
-        if not state.paused:
-            self._process_frames_and_vertices()
-
         self._render_scene()
 
     def _prepare_opengl(self):
@@ -98,21 +132,31 @@ class GLWidget(QGLWidget):
         glRotatef(state.pitch, 1, 0, 0)
         glRotatef(state.yaw, 0, 1, 0)
 
-    def _process_frames_and_vertices(self):
-        depth_frame = self.rs_manager.get_depth_frame()
-        color_frame = self.rs_manager.get_color_frame()
+    def _process_frames_and_vertices(self, frames):
+        """Build the cloud for one frameset and stage it for upload (runs on the worker thread)."""
+        start = time.perf_counter()
+        depth_frame = frames.depth
+        color_frame = frames.color
 
         if depth_frame:
-            if not self.detection_data._is_dark:
-                self.pc.map_to(color_frame)
-            points = self.pc.calculate(depth_frame)
-
-            v, t = points.get_vertices(), points.get_texture_coordinates()
-            verts = np.asanyarray(v).view(np.float32).reshape(-1, 3)
-            texcoords = np.asanyarray(t).view(np.float32).reshape(-1, 2)
-            verts[:, 0] *= -1  # Flip the X-axis for the mirror effect
-            verts[:, 2] *= -1  # Invert Z-axis for OpenGL's coordinate system
-            verts[:, 1] *= -1  # Invert Y-axis for OpenGL's coordinate system
+            if isinstance(depth_frame, ArrayFrame):
+                verts, texcoords = self._deproject_array_frame(frames.depth_image, frames.calibration)
+            else:
+                if not frames.is_dark:
+                    self.pc.map_to(color_frame)
+                points = self.pc.calculate(depth_frame)
+
+                v, t = points.get_vertices(), points.get_texture_coordinates()
+                verts = np.asanyarray(v).view(np.float32).reshape(-1, 3)
+                texcoords = np.asanyarray(t).view(np.float32).reshape(-1, 2)
+
+            if self.point_shader.available and self.live_config.shader_crop and not self.live_config.voxel_lod:
+                # The shader transforms and crops the whole camera-space cloud with the current sliders
+                self.renderer.set_points(verts, texcoords, frames.color_image, frames.seq,
+                                         camera_space=True, half_precision=self.live_config.point_half_precision)
+                self.health_metrics.record_latency("pointcloud", time.perf_counter() - start)
+                self._observe_detection()
+                return
 
             rotation = [
                 self.live_config.rotate_x,
@@ -124,62 +168,67 @@ class GLWidget(QGLWidget):
                 self.live_config.translate_y,
                 self.live_config.translate_z
             ]
-            transformed_verts = apply_dynamic_transformation(verts, rotation, translation)
-
-            x_min, x_max = self.live_config.x_threshold_min, self.live_config.x_threshold_max
-            y_min, y_max = self.live_config.y_threshold_min, self.live_config.y_threshold_max
-            z_min, z_max = self.live_config.z_threshold_min, self.live_config.z_threshold_max
-
-            valid_indices = np.where(
-                (transformed_verts[:, 0] >= x_min) & (transformed_verts[:, 0] <= x_max) &
-                (transformed_verts[:, 1] >= y_min) & (transformed_verts[:, 1] <= y_max) &
-                (transformed_verts[:, 2] >= z_min) & (transformed_verts[:, 2] <= z_max)
+            bounds = (
+                self.live_config.x_threshold_min, self.live_config.x_threshold_max,
+                self.live_config.y_threshold_min, self.live_config.y_threshold_max,
+                self.live_config.z_threshold_min, self.live_config.z_threshold_max,
             )
-            filtered_verts = transformed_verts[valid_indices]
+            # Mirror/GL axis flips, rotation, translation and threshold crop in one pass
+            self.crop_transform.update(rotation, translation)
+            filtered_verts, valid_indices = self.crop_transform.apply(verts, bounds)
             filtered_texcoords = texcoords[valid_indices]
 
-            color_image = np.asanyarray(color_frame.get_data())
-            color_image = cv2.cvtColor(color_image, cv2.COLOR_BGR2RGB)
-            h, w, _ = color_image.shape
-            filtered_texcoords[:, 0] *= w
-            filtered_texcoords[:, 1] *= h
-            filtered_texcoords = filtered_texcoords.astype(int)
-            np.clip(filtered_texcoords[:, 0], 0, w - 1, out=filtered_texcoords[:, 0])
-            np.clip(filtered_texcoords[:, 1], 0, h - 1, out=filtered_texcoords[:, 1])
-
-            colors = color_image[filtered_texcoords[:, 1], filtered_texcoords[:, 0]]
-            self.vertices = filtered_verts
-            self.colors = colors / 255.0
-
-            self.set_active_movement(depth_frame = depth_frame, rotation = rotation, translation = translation)
-            
-    def set_active_movement(self, depth_frame, rotation, translation):
-        object_boxes = self.detection_data.get_object_boxes()
-        intrinsics = self.rs_manager.get_depth_intrinsics()
-        depth_image = np.asanyarray(depth_frame.get_data())
-        depth_scale = self.rs_manager.get_depth_scale()
-        
-        self.headpoints_transformed = compute_object_points(
-            object_boxes, intrinsics, depth_image, depth_scale, rotation, translation
-        )
-        self.active_movement_id = update_active_movement(
-            self.headpoints_transformed,
-            image_width=848, image_height=480, intrinsics=intrinsics
-        )
-        self.detection_data.set_active_movement_id(self.active_movement_id)
+            if self.live_config.voxel_lod:
+                # Level-of-detail view: voxel centroids, each textured at the mean of its coordinates
+                filtered_verts, filtered_texcoords = voxel_downsample(filtered_verts, filtered_texcoords, self.live_config.voxel_size)
+            # Colors are looked up on the GPU from the color frame (infrared while dark)
+            self.renderer.set_points(filtered_verts, filtered_texcoords, frames.color_image, frames.seq,
+                                     half_precision=self.live_config.point_half_precision)
+            self.health_metrics.record_latency("pointcloud", time.perf_counter() - start)
+            self._observe_detection()
+
+    def _observe_detection(self):
+        """Take the detection service's latest head points, so markers freeze with the cloud on pause."""
+        result = self.detection_service.latest if self.detection_service is not None else None
+        if result is None:
+            return
+        self.headpoints_transformed = result.headpoints
+        self.active_movement_id = result.active_movement_id
+
+    def _deproject_array_frame(self, depth_image, calibration):
+        """Point cloud for played-back frames, which rs.pointcloud cannot consume.
+
+        Aligned depth shares the color geometry, so each pixel uses the color ray table
+        and its texture coordinate is its own pixel center. Unaligned depth is
+        deprojected with the depth rays and projected into color for texture coordinates.
+        """
+        depth = depth_image.astype(np.float32) * calibration.depth_scale
+        h, w = depth.shape
+
+        if not calibration.aligned:
+            verts = calibration.depth_rays.deproject_image(depth)
+            texcoords = calibration.depth_points_to_color_pixels(verts)
+            texcoords += 0.5
+            texcoords /= (calibration.color_intrinsics.width, calibration.color_intrinsics.height)
+            return verts, texcoords
+
+        verts = calibration.color_rays.deproject_image(depth)
+        u, v = np.meshgrid(np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32))
+        texcoords = np.empty((h * w, 2), dtype=np.float32)
+        texcoords[:, 0] = ((u + 0.5) / w).ravel()
+        texcoords[:, 1] = ((v + 0.5) / h).ravel()
+        return verts, texcoords
 
     def _render_scene(self):
-        if self.vertices is not None and self.colors is not None:
-            glEnableClientState(GL_VERTEX_ARRAY)
-            glEnableClientState(GL_COLOR_ARRAY)
-            glVertexPointer(3, GL_FLOAT, 0, self.vertices)
-            glColorPointer(3, GL_FLOAT, 0, self.colors)
-            glDrawArrays(GL_POINTS, 0, len(self.vertices))
-            glDisableClientState(GL_VERTEX_ARRAY)
-            glDisableClientState(GL_COLOR_ARRAY)
-
-        if self.headpoints_transformed:
-            draw_movement_points(self.headpoints_transformed, self.active_movement_id, self.active_movement_type)
+        self.renderer.draw(self.point_shader)  # Uploads a newer cloud if the worker staged one; otherwise reuses GPU data
+
+        # An index from before num_divisions changed no longer names a gap; skip it until recomputed
+        num_divisions = self.live_config.num_divisions
+        active_divider_index = self.detection_data.get_active_divider_index(num_divisions)
+        if active_divider_index is not None:
+            fill_divider(active_divider_index, height=2.0, depth=30.0, num_divisions=num_divisions)
+
+        self.marker_renderer.draw(self.headpoints_transformed, self.active_movement_id)
         if self.live_config.draw_planes:
             draw_vertical_dividers()
             draw_horizontal_dividers()
@@ -223,6 +272,8 @@ class GLWidget(QGLWidget):
             state.reset()
         elif event.key() == Qt.Key_P:
             state.paused ^= True
+        elif event.key() == Qt.Key_V:
+            self.live_config.voxel_lod = not self.live_config.voxel_lod
 
     def set_top_view(self):
         state.pitch, state.yaw, state.translation[:] = 70, 0, [0, -6.5, -5.5]
@@ -1,69 +1,144 @@
 import math
+import numpy as np
 from OpenGL.GL import *
-from OpenGL.GLU import *
 from live_config import LiveConfig
 
+# The divider and plane overlays only change with a handful of LiveConfig fields.
+# Each overlay is built once into a vertex buffer and rebuilt only when the tuple
+# of settings it was built from changes, so a paint is one draw call per overlay.
+
+
+class CachedMesh:
+    """Line or face geometry kept in a vertex buffer until its settings key changes."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.key = None
+        self.buffer = None
+        self.count = 0
+
+    def draw(self, key, build):
+        """Draw the mesh, first rebuilding it with `build()` if `key` differs from the cached one."""
+        if self.buffer is None:
+            self.buffer = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffer)
+        if key != self.key:
+            vertices = np.ascontiguousarray(build(), dtype=np.float32)
+            self.count = len(vertices)
+            if self.count:
+                glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+            self.key = key
+
+        if self.count:
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glVertexPointer(3, GL_FLOAT, 0, None)
+            glDrawArrays(self.mode, 0, self.count)
+            glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+
+vertical_divider_mesh = CachedMesh(GL_LINES)
+horizontal_divider_mesh = CachedMesh(GL_LINES)
+divider_fill_mesh = CachedMesh(GL_QUADS)
+
+
+def divider_angles(total_angle_span, num_divisions):
+    """Evenly spaced divider angles in degrees, centered on straight ahead."""
+    return [-total_angle_span / 2 + i * (total_angle_span / num_divisions) for i in range(num_divisions + 1)]
+
+
+def _loop_edges(corners):
+    """(4, 3) corners of a line loop as 8 vertices of GL_LINES."""
+    return [corners[0], corners[1], corners[1], corners[2], corners[2], corners[3], corners[3], corners[0]]
+
+
+def build_vertical_dividers(angles, height, depth, center_x, camera_z):
+    """One wireframe plane per divider angle, from the camera out to `depth`."""
+    vertices = []
+    for angle in angles:
+        # Calculate x-coordinates using tangent for wider angles
+        x_far = depth * math.tan(math.radians(angle))
+        vertices += _loop_edges([
+            (center_x, -height / 2, camera_z),
+            (center_x, height / 2, camera_z),
+            (center_x + x_far, height / 2, camera_z - depth),
+            (center_x + x_far, -height / 2, camera_z - depth),
+        ])
+    return np.array(vertices, dtype=np.float32).reshape(-1, 3)
+
+
+def build_horizontal_dividers(dividers, camera_z, depth, width, num_slices):
+    """Border and grid lines of each (y, tilt angle) plane, tilted around the x-axis."""
+    vertices = []
+    for y, angle in dividers:
+        local = _loop_edges([(-width / 2, 0.0), (width / 2, 0.0), (width / 2, -depth), (-width / 2, -depth)])
+        # Vertical lines (along depth)
+        for i in range(num_slices + 1):
+            x = -width / 2 + i * (width / num_slices)
+            local += [(x, 0.0), (x, -depth)]
+
+        # Points lie in the plane's y = 0, so the x-axis tilt only moves z into y
+        local = np.array(local, dtype=np.float64)
+        theta = math.radians(angle)
+        plane = np.empty((len(local), 3))
+        plane[:, 0] = local[:, 0]
+        plane[:, 1] = y - local[:, 1] * math.sin(theta)
+        plane[:, 2] = camera_z + local[:, 1] * math.cos(theta)
+        vertices.append(plane)
+    if not vertices:
+        return np.empty((0, 3), dtype=np.float32)
+    return np.concatenate(vertices).astype(np.float32)
+
+
+def build_divider_fill(angle1, angle2, height, depth, center_x, camera_z):
+    """Trapezoidal prism between two divider angles, as 6 quads."""
+    x1_far = depth * math.tan(math.radians(angle1)) + center_x
+    x2_far = depth * math.tan(math.radians(angle2)) + center_x
+    near, far = camera_z, camera_z - depth
+    top, bottom = height / 2, -height / 2
+    return np.array([
+        # Front face (near the camera)
+        (center_x, bottom, near), (center_x, top, near), (x2_far, top, far), (x1_far, bottom, far),
+        # Back face
+        (x1_far, bottom, far), (x1_far, top, far), (x2_far, top, far), (x2_far, bottom, far),
+        # Left side (angle1)
+        (center_x, bottom, near), (center_x, top, near), (x1_far, top, far), (x1_far, bottom, far),
+        # Right side (angle2)
+        (center_x, bottom, near), (center_x, top, near), (x2_far, top, far), (x2_far, bottom, far),
+        # Top side (between angle1 and angle2)
+        (center_x, top, near), (x1_far, top, far), (x2_far, top, far), (center_x, top, near),
+        # Bottom side (between angle1 and angle2)
+        (center_x, bottom, near), (x1_far, bottom, far), (x2_far, bottom, far), (center_x, bottom, near),
+    ], dtype=np.float32)
+
+
 def draw_vertical_dividers(height=2.0, depth=30.0, center_x=0):
     """Draw multiple vertical dividers with evenly spaced x-coordinates."""
     # Access the LiveConfig instance
     live_config = LiveConfig.get_instance()
     if not live_config.show_vertical_planes:
         return
-    
-    num_divisions = live_config.num_divisions  # Total number of divider planes
-    camera_z = live_config.camera_z
-
-    # Define the total angle span (-90° to +90°) and calculate even steps
-    total_angle_span = live_config.x_divider_angle
-  # We want to cover a full 180° field
-    angles = [-total_angle_span/2 + i * (total_angle_span / num_divisions) for i in range(num_divisions + 1)]
-
-    for i in range(len(angles) - 1):
-        angle1, angle2 = math.radians(angles[i]), math.radians(angles[i + 1])
-        
-        # Calculate x-coordinates using tangent for wider angles
-        x1_far = depth * math.tan(angle1)
-        x2_far = depth * math.tan(angle2)
-        
-        glPushMatrix()
-        glTranslatef(center_x, 0, camera_z)
-        
-        # Draw the first wireframe plane
-        glColor3f(0.5, 0.5, 0.5)  # Light gray color for wireframes
-        glBegin(GL_LINE_LOOP)
-        glVertex3f(0.0, -height / 2, 0.0)
-        glVertex3f(0.0, height / 2, 0.0)
-        glVertex3f(x1_far, height / 2, -depth)
-        glVertex3f(x1_far, -height / 2, -depth)
-        glEnd()
-        
-        # Draw the second wireframe plane
-        glBegin(GL_LINE_LOOP)
-        glVertex3f(0.0, -height / 2, 0.0)
-        glVertex3f(0.0, height / 2, 0.0)
-        glVertex3f(x2_far, height / 2, -depth)
-        glVertex3f(x2_far, -height / 2, -depth)
-        glEnd()
-    
-        glPopMatrix()
-
-def fill_divider(index_to_fill, height=2.0, depth=30.0, center_x=0):
+
+    key = (live_config.num_divisions, live_config.x_divider_angle, live_config.camera_z, height, depth, center_x)
+    glColor3f(0.5, 0.5, 0.5)  # Light gray color for wireframes
+    vertical_divider_mesh.draw(key, lambda: build_vertical_dividers(
+        divider_angles(live_config.x_divider_angle, live_config.num_divisions),
+        height, depth, center_x, live_config.camera_z,
+    ))
+
+def fill_divider(index_to_fill, height=2.0, depth=30.0, center_x=0, num_divisions=None):
     """Fill only the space between two adjacent dividers at index_to_fill with a 3D transparent green object."""
     # Access the LiveConfig instance
     live_config = LiveConfig.get_instance()
-    x_divider_angle = live_config.x_divider_angle
-    num_divisions = live_config.num_divisions  # Use the same `num_divisions` for consistency
-    camera_z = live_config.camera_z
-    # Define the angle span and calculate even angles as in `draw_vertical_dividers`
-    total_angle_span = x_divider_angle
-    angles = [-total_angle_span / 2 + i * (total_angle_span / num_divisions) for i in range(num_divisions + 1)]
-    
+    if num_divisions is None:
+        num_divisions = live_config.num_divisions  # Use the same `num_divisions` for consistency
+    if not 0 <= index_to_fill < num_divisions:
+        return  # Stale index from a larger division count
     # Get the two angles that define the space we want to fill
-    angle1 = math.radians(angles[index_to_fill])
-    angle2 = math.radians(angles[index_to_fill + 1])
+    angles = divider_angles(live_config.x_divider_angle, num_divisions)
+    angle1, angle2 = angles[index_to_fill], angles[index_to_fill + 1]
+    key = (angle1, angle2, live_config.camera_z, height, depth, center_x)
 
-    glPushMatrix()
-    
     # Enable blending and set transparent green color
     glEnable(GL_BLEND)
     glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
@@ -71,122 +146,25 @@ def fill_divider(index_to_fill, height=2.0, depth=30.0, center_x=0):
 
     # Disable depth writing for transparency
     glDepthMask(GL_FALSE)
-
-    # Calculate x-coordinates at depth for the specified space
-    x1_far = depth * math.tan(angle1) + center_x
-    x2_far = depth * math.tan(angle2) + center_x
-
-    # Draw trapezoidal prism for the specified space
-    glBegin(GL_QUADS)
-
-    # Front face (near the camera)
-    glVertex3f(center_x, -height / 2, camera_z)
-    glVertex3f(center_x, height / 2, camera_z)
-    glVertex3f(x2_far, height / 2, camera_z - depth)
-    glVertex3f(x1_far, -height / 2, camera_z - depth)
-
-    # Back face
-    glVertex3f(x1_far, -height / 2, camera_z - depth)
-    glVertex3f(x1_far, height / 2, camera_z - depth)
-    glVertex3f(x2_far, height / 2, camera_z - depth)
-    glVertex3f(x2_far, -height / 2, camera_z - depth)
-
-    # Left side (angle1)
-    glVertex3f(center_x, -height / 2, camera_z)
-    glVertex3f(center_x, height / 2, camera_z)
-    glVertex3f(x1_far, height / 2, camera_z - depth)
-    glVertex3f(x1_far, -height / 2, camera_z - depth)
-
-    # Right side (angle2)
-    glVertex3f(center_x, -height / 2, camera_z)
-    glVertex3f(center_x, height / 2, camera_z)
-    glVertex3f(x2_far, height / 2, camera_z - depth)
-    glVertex3f(x2_far, -height / 2, camera_z - depth)
-
-    # Top side (between angle1 and angle2)
-    glVertex3f(center_x, height / 2, camera_z)
-    glVertex3f(x1_far, height / 2, camera_z - depth)
-    glVertex3f(x2_far, height / 2, camera_z - depth)
-    glVertex3f(center_x, height / 2, camera_z)
-
-    # Bottom side (between angle1 and angle2)
-    glVertex3f(center_x, -height / 2, camera_z)
-    glVertex3f(x1_far, -height / 2, camera_z - depth)
-    glVertex3f(x2_far, -height / 2, camera_z - depth)
-    glVertex3f(center_x, -height / 2, camera_z)
-
-    glEnd()
+    divider_fill_mesh.draw(key, lambda: build_divider_fill(angle1, angle2, height, depth, center_x, live_config.camera_z))
 
     # Re-enable depth writing after drawing the transparent object
     glDepthMask(GL_TRUE)
     glDisable(GL_BLEND)
-    glPopMatrix()
 
 def draw_horizontal_dividers(camera_y=0, depth=30.0, width=50.0, num_slices=80):
     # Access the LiveConfig instance
     live_config = LiveConfig.get_instance()
 
-    # Get divider values from LiveConfig
-    y_top_divider = live_config.y_top_divider
-    y_bottom_divider = live_config.y_bottom_divider
-    y_top_divider_angle = live_config.y_top_divider_angle
-    y_bottom_divider_angle = live_config.y_bottom_divider_angle
-
-    # Calculate the y positions for the planes based on divider values
-    # dividers = [
-    #     (camera_y + y_top_divider, y_top_divider_angle),  # Top divider with its angle
-    #     (camera_y - y_bottom_divider, y_bottom_divider_angle),  # Bottom divider with its angle
-    # ]
+    # Calculate the y positions and tilt angles for the planes based on divider values
     dividers = []
     if live_config.show_top_plane:
-        dividers.append((camera_y + y_top_divider, live_config.y_top_divider_angle))
+        dividers.append((camera_y + live_config.y_top_divider, live_config.y_top_divider_angle))
     if live_config.show_bottom_plane:
         dividers.append((camera_y - live_config.y_bottom_divider, live_config.y_bottom_divider_angle))
 
-    # Loop through each divider position and angle to draw the wireframe plane
-    for y, angle in dividers:
-        glPushMatrix()  # Save the current matrix
-        glColor4f(0.5, 0.5, 0.5, 0.5)  # Light gray color with moderate transparency
-
-        # Translate to the starting position of the plane
-        glTranslatef(0, y, live_config.camera_z)
-
-        # Apply rotation to tilt the plane
-        glRotatef(angle, 1.0, 0.0, 0.0)  # Rotate around the x-axis for tilt
-
-        # Draw the outer border of the plane
-        glBegin(GL_LINE_LOOP)
-        glVertex3f(-width / 2, 0.0, 0.0)  # Bottom-left corner
-        glVertex3f(width / 2, 0.0, 0.0)   # Bottom-right corner
-        glVertex3f(width / 2, 0.0, -depth)  # Top-right corner (extending into -z)
-        glVertex3f(-width / 2, 0.0, -depth)  # Top-left corner (extending into -z)
-        glEnd()
-
-        # Draw the internal grid lines
-        glBegin(GL_LINES)
-        # Vertical lines (along depth)
-        for i in range(num_slices + 1):
-            x = -width / 2 + i * (width / num_slices)
-            glVertex3f(x, 0.0, 0.0)  # Near edge
-            glVertex3f(x, 0.0, -depth)  # Far edge
-
-        glEnd()
-
-        glPopMatrix()  # Restore the previous matrix
-
-def draw_movement_points(transformed_head_points, active_movement_id, active_movement_type):
-    for track_id, head_point in transformed_head_points.items():
-        if head_point is None:
-            continue  
-        x_h, y_h, z_h = head_point
-        if track_id == active_movement_id:
-            glColor3f(1,0, 0)  
-        else:
-            glColor3f(1,0, 0) 
-
-        # Draw the sphere for the head point
-        glPushMatrix()
-        glTranslatef(x_h, y_h, z_h)  # Move to the head point's location
-        gluSphere(gluNewQuadric(), 0.07, 30, 30)  # Draw a sphere with radius 0.05
-        glPopMatrix()
-    
\ No newline at end of file
+    key = (tuple(dividers), live_config.camera_z, depth, width, num_slices)
+    glColor4f(0.5, 0.5, 0.5, 0.5)  # Light gray color with moderate transparency
+    horizontal_divider_mesh.draw(key, lambda: build_horizontal_dividers(
+        dividers, live_config.camera_z, depth, width, num_slices,
+    ))
@@ -0,0 +1,171 @@
+"""
+Point cloud renderer backed by vertex buffer objects and a color texture.
+
+Vertices and texture coordinates live in GPU buffers that are allocated once
+(and grown only when a cloud outgrows them). The color frame is uploaded as a
+texture and each point looks up its color on the GPU, so no per-point colors
+are gathered on the CPU.
+
+A new cloud is staged with `set_points`, from any thread, and uploaded on the
+next draw by orphaning the buffers and writing the data with sub-data uploads, so the driver
+never stalls on a buffer the GPU is still reading. Repaints without a new cloud
+(pause, camera orbit) draw straight from GPU memory.
+
+Colors stay uint8 in the texture. Positions and texture coordinates are
+float32 by default; with `half_precision` they are staged and uploaded as
+float16 (GL_HALF_FLOAT), halving the per-point upload and staging memory. That
+resolves ~4 mm at 4 m and under half a texel for the texture lookup, which is
+invisible at viewing distance.
+
+A cloud is either already transformed and cropped on the CPU, or staged in
+camera space and drawn through a `PointCloudShader` that transforms and crops
+it on the GPU. The renderer remembers which one it holds, so a cloud is never
+drawn in the wrong space while the viewer switches between the two.
+
+All GL calls happen in `initialize`, `draw` and `release`, which must run with
+the widget's GL context current.
+
+Example:
+    renderer = PointCloudRenderer()
+    renderer.initialize()                                      # In initializeGL
+    renderer.set_points(vertices, texcoords, bundle.color_image) # Whenever a new cloud is ready
+    renderer.draw(shader)                                      # In paintGL
+"""
+
+import threading
+import numpy as np
+from OpenGL.GL import *
+
+BUFFER_GROWTH = 1.25  # Headroom when a buffer must grow, so small size changes do not reallocate
+
+
+class PointCloudRenderer:
+    """Draws a textured point cloud from GPU-resident vertex and texcoord buffers."""
+
+    def __init__(self):
+        self.vertex_buffer = None
+        self.texcoord_buffer = None
+        self.texture = None
+        self.vertex_capacity = 0  # Bytes allocated per buffer
+        self.texcoord_capacity = 0
+        self.texture_shape = None  # Shape of the image currently held by the texture
+        self.count = 0  # Points currently in the buffers
+        self.seq = 0  # Frame sequence of the uploaded cloud
+        self.camera_space = False  # True if the uploaded cloud still needs the shader's transform and crop
+        self.attribute_type = GL_FLOAT  # GL_HALF_FLOAT while the buffers hold float16 attributes
+        # CPU staging copies, so callers may reuse their arrays as soon as set_points returns
+        self._staged_vertices = np.empty((0, 3), dtype=np.float32)
+        self._staged_texcoords = np.empty((0, 2), dtype=np.float32)
+        self._pending = None  # (vertex view, texcoord view, image, seq, camera_space) waiting for upload
+        self._lock = threading.Lock()
+
+    def initialize(self):
+        self.vertex_buffer, self.texcoord_buffer = glGenBuffers(2)
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        # Nearest texel and clamped edges match a direct pixel lookup
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def set_points(self, vertices, texcoords, image, seq=0, camera_space=False, half_precision=False):
+        """Stage a new cloud; safe to call from a worker thread.
+
+        :param vertices: (N, 3) positions (copied)
+        :param texcoords: (N, 2) normalized coordinates into `image` (copied)
+        :param image: BGR (H, W, 3) or infrared (H, W) uint8 image; must not change after the call
+        :param seq: Frame sequence the cloud was built from
+        :param camera_space: Vertices are untransformed and uncropped; drawn only through a shader
+        :param half_precision: Stage and upload positions and texture coordinates as float16
+        """
+        count = len(vertices)
+        dtype = np.float16 if half_precision else np.float32
+        with self._lock:
+            # A newer cloud simply overwrites one that was not uploaded yet
+            if len(self._staged_vertices) < count or self._staged_vertices.dtype != dtype:
+                capacity = max(int(count * BUFFER_GROWTH), len(self._staged_vertices))
+                self._staged_vertices = np.empty((capacity, 3), dtype=dtype)
+                self._staged_texcoords = np.empty((capacity, 2), dtype=dtype)
+            np.copyto(self._staged_vertices[:count], vertices, casting="unsafe")
+            np.copyto(self._staged_texcoords[:count], texcoords, casting="unsafe")
+            self._pending = (self._staged_vertices[:count], self._staged_texcoords[:count], image, seq, camera_space)
+
+    def draw(self, shader=None):
+        """Draw the latest cloud; `shader` transforms and crops camera-space clouds."""
+        self._upload_pending()
+        if self.count == 0:
+            return
+        if self.camera_space and shader is None:
+            return  # Nothing to put it into view space with
+        if self.camera_space:
+            shader.bind()
+
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_REPLACE)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vertex_buffer)
+        glVertexPointer(3, self.attribute_type, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, self.texcoord_buffer)
+        glTexCoordPointer(2, self.attribute_type, 0, None)
+        glDrawArrays(GL_POINTS, 0, self.count)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
+        if self.camera_space:
+            shader.unbind()
+
+    def release(self):
+        if self.vertex_buffer is not None:
+            glDeleteBuffers(2, [self.vertex_buffer, self.texcoord_buffer])
+            glDeleteTextures([self.texture])
+            self.vertex_buffer = self.texcoord_buffer = self.texture = None
+            self.vertex_capacity = self.texcoord_capacity = 0
+            self.texture_shape = None
+            self.count = 0
+
+    def _upload_pending(self):
+        with self._lock:  # Held during the upload so the staging arrays are not rewritten mid-copy
+            if self._pending is None or self.vertex_buffer is None:
+                return
+            vertices, texcoords, image, self.seq, self.camera_space = self._pending
+            self._pending = None
+            self.vertex_capacity = self._upload(self.vertex_buffer, vertices, self.vertex_capacity)
+            self.texcoord_capacity = self._upload(self.texcoord_buffer, texcoords, self.texcoord_capacity)
+            self.count = len(vertices)
+            self.attribute_type = GL_HALF_FLOAT if vertices.dtype == np.float16 else GL_FLOAT
+        self._upload_texture(image)
+
+    def _upload_texture(self, image):
+        """Upload the color frame as is: BGR for color, luminance for infrared."""
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        pixel_format = GL_BGR if image.ndim == 3 else GL_LUMINANCE
+
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)  # Rows are tightly packed
+        if image.shape != self.texture_shape:
+            internal_format = GL_RGB8 if image.ndim == 3 else GL_LUMINANCE8
+            glTexImage2D(GL_TEXTURE_2D, 0, internal_format, width, height, 0, pixel_format, GL_UNSIGNED_BYTE, image)
+            self.texture_shape = image.shape
+        else:
+            glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, width, height, pixel_format, GL_UNSIGNED_BYTE, image)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    @staticmethod
+    def _upload(buffer, data, capacity):
+        """Write `data` to `buffer`, growing or orphaning its storage; returns the capacity."""
+        glBindBuffer(GL_ARRAY_BUFFER, buffer)
+        if data.nbytes > capacity:
+            capacity = int(data.nbytes * BUFFER_GROWTH)
+        # Orphan the old storage so the upload never waits for the GPU to finish drawing it
+        glBufferData(GL_ARRAY_BUFFER, capacity, None, GL_DYNAMIC_DRAW)
+        if data.nbytes:
+            glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        return capacity
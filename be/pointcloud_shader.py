@@ -0,0 +1,118 @@
+"""
+GLSL program that transforms, crops and sizes the point cloud on the GPU.
+
+The worker uploads the untransformed camera-space cloud; the vertex shader
+applies the axis flips, rotation and translation as one 4x4 matrix, drops points
+outside the x/y/z thresholds by moving them outside the clip volume, and sets the
+point size. All of these are uniforms read from LiveConfig at draw time, so
+moving a threshold or transform slider costs nothing on the CPU and takes effect
+on the next repaint, even while paused.
+
+The viewer draws everything else with the fixed-function pipeline, so the
+program targets GLSL 1.20 and the compatibility built-ins (`gl_Vertex`,
+`gl_ModelViewProjectionMatrix`). If it fails to compile, `available` stays False
+and the viewer keeps cropping on the CPU.
+
+Example:
+    shader = PointCloudShader()
+    shader.initialize()  # In initializeGL
+    shader.bind()        # Around the point draw in paintGL
+    ...
+    shader.unbind()
+"""
+
+import logging
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+from OpenGL.error import GLError
+from live_config import LiveConfig
+from transformation_utils import CAMERA_TO_GL_FLIPS, build_transform_matrix
+
+VERTEX_SHADER = """
+#version 120
+uniform mat4 model;        // Axis flips, rotation and translation
+uniform vec3 bounds_min;   // Threshold crop in transformed space
+uniform vec3 bounds_max;
+uniform float point_size;
+
+void main() {
+    vec4 position = model * gl_Vertex;
+    gl_TexCoord[0] = gl_MultiTexCoord0;
+    gl_PointSize = point_size;
+    if (all(greaterThanEqual(position.xyz, bounds_min)) && all(lessThanEqual(position.xyz, bounds_max))) {
+        gl_Position = gl_ModelViewProjectionMatrix * position;
+    } else {
+        gl_Position = vec4(2.0, 2.0, 2.0, 1.0);  // Outside the clip volume: culled before rasterization
+    }
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+uniform sampler2D color_texture;
+
+void main() {
+    gl_FragColor = texture2D(color_texture, gl_TexCoord[0].st);  // Luminance textures expand to gray
+}
+"""
+
+_logger = logging.getLogger(__name__)
+
+
+class PointCloudShader:
+    """Point cloud program with transform, crop and point size uniforms fed from LiveConfig."""
+
+    def __init__(self, axis_flips=CAMERA_TO_GL_FLIPS):
+        self.live_config = LiveConfig.get_instance()
+        self.axis_flips = tuple(axis_flips)
+        self.program = None
+        self.uniforms = {}
+        self.key = None  # Rotate/translate settings the cached matrix was built from
+        self.matrix = None
+
+    @property
+    def available(self):
+        return self.program is not None
+
+    def initialize(self):
+        try:
+            self.program = shaders.compileProgram(
+                shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+                shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+            )
+        except (RuntimeError, GLError) as e:
+            _logger.warning(f"Point cloud shader unavailable, cropping on the CPU: {e}")
+            self.program = None
+            return
+        for name in ("model", "bounds_min", "bounds_max", "point_size", "color_texture"):
+            self.uniforms[name] = glGetUniformLocation(self.program, name)
+
+    def _model_matrix(self):
+        c = self.live_config
+        rotation = (c.rotate_x, c.rotate_y, c.rotate_z)
+        translation = (c.translate_x, c.translate_y, c.translate_z)
+        key = (rotation, translation)
+        if key != self.key:
+            self.matrix = build_transform_matrix(rotation, translation, self.axis_flips)
+            self.key = key
+        return self.matrix
+
+    def bind(self):
+        c = self.live_config
+        glUseProgram(self.program)
+        # Row-major NumPy matrix, so let GL transpose it
+        glUniformMatrix4fv(self.uniforms["model"], 1, GL_TRUE, self._model_matrix())
+        glUniform3f(self.uniforms["bounds_min"], c.x_threshold_min, c.y_threshold_min, c.z_threshold_min)
+        glUniform3f(self.uniforms["bounds_max"], c.x_threshold_max, c.y_threshold_max, c.z_threshold_max)
+        glUniform1f(self.uniforms["point_size"], c.point_size)
+        glUniform1i(self.uniforms["color_texture"], 0)
+        glEnable(GL_VERTEX_PROGRAM_POINT_SIZE)
+
+    def unbind(self):
+        glDisable(GL_VERTEX_PROGRAM_POINT_SIZE)
+        glUseProgram(0)
+
+    def release(self):
+        if self.program is not None:
+            glDeleteProgram(self.program)
+            self.program = None
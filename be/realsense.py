@@ -1,142 +1,124 @@
-import pyrealsense2 as rs
-from PyQt5.QtCore import QTimer, pyqtSignal, QObject, QThread
+from PyQt5.QtCore import pyqtSignal, QObject
 from PyQt5.QtWidgets import QMessageBox
+import logging
 import numpy as np
-import cv2
-import socket
 import threading
+import time
 from detection_data import DetectionData
+from frame_slot import LatestFrameSlot, LATEST_ONLY
+from frame_source import RealSenseFrameSource
+from calibration import Calibration
+from low_light_monitor import LowLightMonitor
+from frame_bundle import FrameBundle
+from health_metrics import HealthMetrics
+from health_server import HealthServer
+
+_logger = logging.getLogger(__name__)
+
 
 class RealSenseManager(QObject):
     camera_disconnected = pyqtSignal()  # Signal to notify disconnection
 
-    def __init__(self, server_host="localhost", server_port=12345):
+    def __init__(self, server_host="localhost", server_port=12345, frame_source=None):
         super().__init__()
-        self.pipeline = rs.pipeline()
-        config = rs.config()
-
-        # Enable streams
-        config.enable_stream(rs.stream.color, 848, 480, rs.format.bgr8, 60)
-        config.enable_stream(rs.stream.depth, 848, 480, rs.format.z16, 60)
-        config.enable_stream(rs.stream.infrared, 1, 848, 480, rs.format.y8, 60)
+        # Live camera by default; recordings and playback plug in through the same interface
+        self.frame_source = frame_source if frame_source is not None else RealSenseFrameSource()
 
         self.initialized = False  # Track if camera started successfully
+        self.health_metrics = HealthMetrics()  # Shared with the processing stages and the health server
 
         try:
-            self.pipeline_profile = self.pipeline.start(config)
+            self.frame_source.start()
             self.initialized = True  # Camera started successfully
         except RuntimeError:
             self.initialized = False  # Camera failed to start
+            self.health_metrics.set_camera_state("disconnected")
             self.camera_disconnected.emit()  # Notify UI
             return  # Exit initialization without crashing
 
-        # Initialize align object to align depth to color
-        self.align = rs.align(rs.stream.color)
+        # Intrinsics, depth scale and ray tables; rebuilt only if the delivered depth profile changes
+        self.calibration = Calibration.from_source(self.frame_source)
 
-        self.color_frame = None
-        self.depth_frame = None
-        self.infrared_frame = None
-        self.brightness_threshold = 100  # Brightness threshold for switching to infrared
-
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frames)
-        self.timer.start(30)  # Approximately 30 FPS
+        self.frame_slot = LatestFrameSlot()  # Latest frameset, written by the capture thread
+        self.health_metrics.set_frame_stats_source(self.frame_slot.subscription_stats)  # Per-consumer delivered/dropped
+        self.frame_sequence = 0  # Sequence number of the last published frameset
+        self.low_light_monitor = LowLightMonitor()  # Sampled brightness with hysteresis for infrared switching
 
         self.detection_data = DetectionData()
         self.camera_connected = True  # Flag to track camera status
+        self.health_metrics.set_camera_state("connected")
+
+        # Capture runs on its own thread so a slow or missing frame never stalls the GUI
+        self.capture_running = True
+        self.capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
+        self.capture_thread.start()
 
-        # Start the server
-        self.server_host = server_host
-        self.server_port = server_port
-        self.server_running = True
-        self.server_thread = threading.Thread(target=self.start_server, daemon=True)
-        self.server_thread.start()
+        # Push camera state and pipeline metrics to subscribed frontends/monitors
+        self.health_server = HealthServer(server_host, server_port, self.health_metrics)
+        self.health_server.start()
+
+    def capture_loop(self):
+        """Pull framesets at the camera rate until stopped or disconnected."""
+        while self.capture_running:
+            self.update_frames()
 
     def update_frames(self):
-        """Fetch and process frames, detect camera disconnection."""
+        """Fetch and process one frameset, detect camera disconnection."""
         if not self.initialized:
             return  # Skip processing if camera is not initialized
         try:
-            frames = self.pipeline.wait_for_frames(timeout_ms=5000)  # Timeout ensures detection of disconnection
-
-            # Align depth to color
-            aligned_frames = self.align.process(frames)
+            # Timeout ensures detection of disconnection
+            # Depth filtering and alignment happen inside and are recorded as the "depth_processing" stage
+            color_frame, depth_frame, infrared_frame = self.frame_source.wait_for_frames(timeout_ms=5000)
+            capture_start = time.perf_counter()
 
-            self.color_frame = aligned_frames.get_color_frame()
-            self.depth_frame = aligned_frames.get_depth_frame()
-            self.infrared_frame = frames.get_infrared_frame()
+            # Decimation settings changed the delivered depth resolution; consumers pick up the new snapshot
+            if self.frame_source.depth_profile_changed():
+                self.calibration = Calibration.from_source(self.frame_source)
 
-            if not self.color_frame or not self.depth_frame:
+            if not color_frame or not depth_frame:
                 return  # Skip frame if either is missing
 
             # Reset camera disconnection flag (camera is active)
             self.camera_connected = True  
 
-            # Check brightness of color frame
-            color_image = np.asanyarray(self.color_frame.get_data())
-            brightness = np.mean(cv2.cvtColor(color_image, cv2.COLOR_BGR2GRAY))
-
-            # Use infrared frame as color if brightness is below threshold
-            if brightness < self.brightness_threshold:
-                self.detection_data.set_is_dark(True)
-                self.color_frame = self.infrared_frame
-            else:
-                self.detection_data.set_is_dark(False)
+            # Use infrared frame as color while the scene is dark
+            is_dark = self.low_light_monitor.update(np.asanyarray(color_frame.get_data()))
+            self.detection_data.set_is_dark(is_dark)
+            if is_dark:
+                color_frame = infrared_frame
+
+            # Frames outlive this call, so release them from the pipeline's pool before publishing
+            color_frame.keep()
+            depth_frame.keep()
+            infrared_frame.keep()
+            self.frame_sequence += 1
+            self.frame_slot.publish(FrameBundle(
+                color_frame, depth_frame, infrared_frame,
+                self.frame_sequence, depth_frame.get_timestamp(), is_dark, self.calibration
+            ))
+            self.health_metrics.record_frame(self.frame_sequence)
+            self.health_metrics.record_latency("capture", time.perf_counter() - capture_start)
 
         except RuntimeError:
             if self.camera_connected:  # Show error popup only once per disconnection
                 self.camera_connected = False  # Mark as disconnected
-                self.camera_disconnected.emit()  # Notify MainWindow
+                self.health_metrics.set_camera_state("disconnected")
+                self.camera_disconnected.emit()  # Notify MainWindow (queued to the GUI thread)
                 self.stop()  # Stop the pipeline to avoid further errors
+        except Exception:
+            # Anything else is a bad frameset, not a lost camera; keep capturing
+            _logger.exception("Frame capture failed, skipping frameset")
 
-    def get_color_frame(self):
-        return self.color_frame  # Returns either color or infrared frame as a pyrealsense2 frame
-
-    def get_depth_frame(self):
-        return self.depth_frame
-
-    def get_depth_intrinsics(self):
-        """Retrieve depth intrinsics (necessary for 2D to 3D projection)."""
-        depth_stream = self.pipeline_profile.get_stream(rs.stream.depth)  # Fetch depth stream profile
-        intrinsics = depth_stream.as_video_stream_profile().get_intrinsics()
-        return intrinsics
-
-    def get_depth_scale(self):
-        """Retrieve the depth scale for converting depth values to meters."""
-        depth_sensor = self.pipeline_profile.get_device().first_depth_sensor()
-        return depth_sensor.get_depth_scale()
+    def subscribe_frames(self, name, mode=LATEST_ONLY):
+        """Register a frame consumer; see frame_slot.EACH_FRAME and frame_slot.LATEST_ONLY."""
+        return self.frame_slot.subscribe(name, mode)
 
     def stop(self):
-        """Stop the pipeline safely and close the server."""
-        try:
-            self.pipeline.stop()
-        except RuntimeError:
-            pass  # Ignore errors if already stopped
+        """Stop the capture thread and pipeline safely and close the server."""
+        self.capture_running = False
+        if threading.current_thread() is not self.capture_thread:
+            self.capture_thread.join(timeout=1.0)
+        self.frame_source.stop()
 
-        self.server_running = False  # Stop server thread
-        try:
-            socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((self.server_host, self.server_port))
-        except Exception:
-            pass  # Ignore errors when closing
-
-    ### 🖥️ SERVER SOCKET FOR CAMERA STATUS ###
-    def start_server(self):
-        """Start a server socket to allow frontend to check camera connection status."""
-        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-
-        try:
-            server_socket.bind((self.server_host, self.server_port))
-            server_socket.listen(5)
-            print(f"Server running at {self.server_host}:{self.server_port}...")
-
-            while self.server_running:
-                client_socket, addr = server_socket.accept()
-                with client_socket:
-                    # Respond with camera connection status
-                    status = "connected" if self.camera_connected else "disconnected"
-                    client_socket.sendall(status.encode())
-        except Exception as e:
-            print(f"Server error: {e}")
-        finally:
-            server_socket.close()
+        self.health_server.stop()  # Closes subscriber connections and the listening socket
@@ -1,11 +1,7 @@
 import math
 import socket
 from collections import deque
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from eye_widget import EyeWidget
 from live_config import LiveConfig
-from pointcloud_drawing_utils import fill_divider
 from detection_data import DetectionData
 import random 
 
@@ -19,6 +15,13 @@ prev_movement_id = None
 stable_x_pos = None
 stable_y_pos = None
 
+# Callbacks notified with each selected image filename (e.g. the backend's eye preview).
+# They run on the thread that selects the image, so Qt widgets must connect through a signal.
+image_listeners = []
+
+def add_image_listener(callback):
+    image_listeners.append(callback)
+
 # Function to update deque lengths dynamically
 def update_deque_maxlen():
     global x_position_history, y_position_history
@@ -28,8 +31,8 @@ def update_deque_maxlen():
         y_position_history = deque(y_position_history, maxlen=live_config.stable_y_thres)
 
 def send_filename_to_server(filename, is_new_movement):
-    eye_widget = EyeWidget()
-    eye_widget.load_image(filename)
+    for listener in image_listeners:
+        listener(filename)
 
     host = 'localhost'
     port = 65432
@@ -101,7 +104,7 @@ def find_x_divider_index(point, center_x=0):
             else:
                 gap_index = len(divider_angles) - 2 
 
-    fill_divider(gap_index, height=2.0, depth=30.0, center_x=center_x)
+    DetectionData().set_active_divider_index(gap_index, num_divisions)  # Highlighted by the viewer when it draws
     return gap_index
 
 # Function to determine Y position based on dividers
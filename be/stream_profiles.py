@@ -0,0 +1,62 @@
+"""
+Named camera stream profiles.
+
+A profile fixes the color and depth resolutions and the frame rate the camera is
+started with. Infrared comes from the depth sensor and always uses the depth
+resolution. LiveConfig selects the active profile by name (`stream_profile`) and
+may add or override profiles in `stream_profiles`, so an installation can trade
+resolution for frame rate from config.json alone.
+
+Everything downstream (ray tables, image sizes, widget aspect ratios) follows the
+calibration of the started stream, never these numbers directly.
+
+Example:
+    profile = get_stream_profile()  # Active profile from LiveConfig
+    source = RealSenseFrameSource(profile)
+"""
+
+import logging
+from collections import namedtuple
+from live_config import LiveConfig
+
+DEFAULT_STREAM_PROFILE = "full"
+
+StreamProfile = namedtuple(
+    "StreamProfile", ["name", "color_width", "color_height", "depth_width", "depth_height", "fps"]
+)
+
+# Built-in profiles; every mode here is supported by the D400 series
+BUILTIN_STREAM_PROFILES = {
+    "full": {"color_width": 848, "color_height": 480, "depth_width": 848, "depth_height": 480, "fps": 60},
+    "low-latency": {"color_width": 640, "color_height": 360, "depth_width": 424, "depth_height": 240, "fps": 60},
+    "low-power": {"color_width": 640, "color_height": 360, "depth_width": 424, "depth_height": 240, "fps": 30},
+}
+
+_logger = logging.getLogger(__name__)
+
+
+def available_stream_profiles():
+    """Built-in profiles merged with those defined in LiveConfig (config wins)."""
+    profiles = dict(BUILTIN_STREAM_PROFILES)
+    profiles.update(LiveConfig.get_instance().stream_profiles)
+    return profiles
+
+
+def get_stream_profile(name=None):
+    """Resolve a profile by name (the LiveConfig selection by default).
+
+    Unknown names fall back to the default profile with a warning rather than
+    leaving the installation without a camera.
+    """
+    name = LiveConfig.get_instance().stream_profile if name is None else name
+    profiles = available_stream_profiles()
+    if name not in profiles:
+        _logger.warning(f"Unknown stream profile '{name}', using '{DEFAULT_STREAM_PROFILE}'")
+        name = DEFAULT_STREAM_PROFILE
+    settings = profiles[name]
+    return StreamProfile(
+        name,
+        int(settings["color_width"]), int(settings["color_height"]),
+        int(settings["depth_width"]), int(settings["depth_height"]),
+        int(settings["fps"]),
+    )
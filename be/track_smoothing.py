@@ -0,0 +1,172 @@
+"""
+Per-track smoothing of head points, stored in contiguous arrays.
+
+Each track id owns a slot in fixed arrays of positions, velocities, timestamps
+and filter state. Slots of tracks that disappear go on a free list and are
+reused in O(1), and the arrays only grow (doubling) when more tracks are alive
+at once than ever before. Every frame updates all tracks with one vectorized
+step of the selected filter:
+
+- "ema": fixed exponential blend, `headpoint_smoothing` weight on the previous
+  point (the original behavior).
+- "one_euro": One-Euro filter; the cutoff rises with speed, so a still head is
+  heavily smoothed while a moving one lags little. Tuned with
+  `one_euro_min_cutoff` (Hz), `one_euro_beta` and `one_euro_d_cutoff` (Hz).
+- "kalman": constant-velocity Kalman filter per axis, tuned with
+  `kalman_process_noise` (acceleration variance, m^2/s^4) and
+  `kalman_measurement_noise` (position variance, m^2).
+
+The filter is selected with `headpoint_filter` in LiveConfig; switching filters
+restarts every track from its next measurement.
+
+Example:
+    smoother = TrackSmoother()
+    smoothed = smoother.update([3, 7], points, timestamp)  # (2, 3) smoothed points
+    smoother.retain([3, 7])                                # Free every other track
+"""
+
+import math
+import time
+import numpy as np
+from live_config import LiveConfig
+
+FILTERS = ("ema", "one_euro", "kalman")
+MIN_DT = 1e-3  # Seconds; guards repeated or out-of-order timestamps
+MAX_DT = 1.0   # Seconds; a longer gap (or a restarted playback) counts as one frame of this length
+INITIAL_VELOCITY_VARIANCE = 1.0  # (m/s)^2 for a new Kalman track, whose speed is unknown
+
+
+def _smoothing_factor(dt, cutoff):
+    """One-Euro low-pass weight of the new sample for time step `dt` and cutoff frequency (Hz)."""
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class TrackSmoother:
+    """Array-backed smoothing state for all live tracks."""
+
+    def __init__(self, capacity=32):
+        self.live_config = LiveConfig.get_instance()
+        self.filter_name = None
+        self.slots = {}  # Track id -> row in the state arrays
+        self.free_slots = []
+        self.capacity = 0
+        self.positions = np.empty((0, 3))
+        self.velocities = np.empty((0, 3))
+        self.timestamps = np.empty(0)
+        # Kalman covariance per axis: [[p00, p01], [p01, p11]]
+        self.p00 = np.empty((0, 3))
+        self.p01 = np.empty((0, 3))
+        self.p11 = np.empty((0, 3))
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        old = self.capacity
+        for name in ("positions", "velocities", "p00", "p01", "p11"):
+            grown = np.zeros((capacity, 3))
+            grown[:old] = getattr(self, name)
+            setattr(self, name, grown)
+        timestamps = np.zeros(capacity)
+        timestamps[:old] = self.timestamps
+        self.timestamps = timestamps
+        self.free_slots.extend(range(capacity - 1, old - 1, -1))  # Lowest rows are handed out first
+        self.capacity = capacity
+
+    def reset(self):
+        """Forget every track."""
+        self.free_slots.extend(self.slots.values())
+        self.slots.clear()
+
+    def _acquire(self, track_id):
+        if not self.free_slots:
+            self._grow(self.capacity * 2)
+        slot = self.free_slots.pop()
+        self.slots[track_id] = slot
+        return slot
+
+    def retain(self, track_ids):
+        """Free the slots of all tracks not in `track_ids`."""
+        keep = set(track_ids)
+        for track_id in [track_id for track_id in self.slots if track_id not in keep]:
+            self.free_slots.append(self.slots.pop(track_id))
+
+    def update(self, track_ids, points, timestamp=None):
+        """Smooth one measurement per track.
+
+        :param track_ids: Ids of the measured tracks, in the order of `points`
+        :param points: (N, 3) measured positions
+        :param timestamp: Measurement time in seconds (monotonic clock by default)
+        :return: (N, 3) smoothed positions; new tracks start at their measurement
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if len(points) == 0:
+            return points
+        now = time.monotonic() if timestamp is None else timestamp
+
+        filter_name = self.live_config.headpoint_filter
+        if filter_name not in FILTERS:
+            filter_name = "ema"
+        if filter_name != self.filter_name:
+            self.reset()
+            self.filter_name = filter_name
+
+        rows = np.empty(len(track_ids), dtype=np.intp)
+        is_new = np.zeros(len(track_ids), dtype=bool)
+        for i, track_id in enumerate(track_ids):
+            slot = self.slots.get(track_id)
+            if slot is None:
+                slot = self._acquire(track_id)
+                is_new[i] = True
+            rows[i] = slot
+
+        # Existing tracks advance by their own elapsed time
+        old = rows[~is_new]
+        if len(old):
+            dt = np.clip(now - self.timestamps[old], MIN_DT, MAX_DT)[:, None]
+            getattr(self, f"_step_{filter_name}")(old, points[~is_new], dt)
+
+        new = rows[is_new]
+        self.positions[new] = points[is_new]
+        self.velocities[new] = 0.0
+        self.p00[new] = self.live_config.kalman_measurement_noise
+        self.p01[new] = 0.0
+        self.p11[new] = INITIAL_VELOCITY_VARIANCE
+
+        self.timestamps[rows] = now
+        return self.positions[rows]
+
+    def _step_ema(self, rows, points, dt):
+        alpha = self.live_config.headpoint_smoothing
+        self.positions[rows] = alpha * self.positions[rows] + (1 - alpha) * points
+
+    def _step_one_euro(self, rows, points, dt):
+        c = self.live_config
+        previous = self.positions[rows]
+        # Low-passed speed decides how much smoothing the position gets
+        speed_weight = _smoothing_factor(dt, c.one_euro_d_cutoff)
+        velocity = speed_weight * (points - previous) / dt + (1 - speed_weight) * self.velocities[rows]
+        cutoff = c.one_euro_min_cutoff + c.one_euro_beta * np.abs(velocity)
+        weight = _smoothing_factor(dt, cutoff)
+        self.positions[rows] = weight * points + (1 - weight) * previous
+        self.velocities[rows] = velocity
+
+    def _step_kalman(self, rows, points, dt):
+        q = self.live_config.kalman_process_noise
+        r = self.live_config.kalman_measurement_noise
+        p00, p01, p11 = self.p00[rows], self.p01[rows], self.p11[rows]
+
+        # Predict with constant velocity and white-acceleration process noise
+        position = self.positions[rows] + self.velocities[rows] * dt
+        p00 = p00 + 2 * dt * p01 + dt * dt * p11 + q * dt ** 4 / 4
+        p01 = p01 + dt * p11 + q * dt ** 3 / 2
+        p11 = p11 + q * dt * dt
+
+        # Correct with the measured position
+        gain_position = p00 / (p00 + r)
+        gain_velocity = p01 / (p00 + r)
+        residual = points - position
+        self.positions[rows] = position + gain_position * residual
+        self.velocities[rows] += gain_velocity * residual
+        self.p11[rows] = p11 - gain_velocity * p01
+        self.p00[rows] = (1 - gain_position) * p00
+        self.p01[rows] = (1 - gain_position) * p01
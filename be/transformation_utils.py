@@ -1,22 +1,17 @@
-
+import functools
 import numpy as np 
 
-def apply_dynamic_transformation(verts, rotation, translation):
-    """
-    Apply rotation and translation to the point cloud vertices based on the control panel values.
-    
-    :param verts: The point cloud vertices to transform (can be a single point or an array of points)
-    :param rotation: A list [rotate_x, rotate_y, rotate_z] with the rotation values in degrees
-    :param translation: A list [translate_x, translate_y, translate_z] with the translation values
-    :return: Transformed vertices
-    """
-    # Ensure verts is a 2D array, even if it's a single point
-    verts = np.atleast_2d(verts)
+# Camera to OpenGL axes: X mirrored to match the display, Y and Z inverted
+CAMERA_TO_GL_FLIPS = (-1.0, -1.0, -1.0)
+
 
+@functools.lru_cache(maxsize=8)
+def _rotation_matrix(rotate_x, rotate_y, rotate_z):
+    """Combined rotation R = Rz * Ry * Rx for angles in degrees, cached per angle triple."""
     # Convert rotation angles from degrees to radians
-    theta_x = np.radians(rotation[0])  # Rotation angle in radians for X-axis
-    theta_y = np.radians(rotation[1])  # Rotation angle in radians for Y-axis
-    theta_z = np.radians(rotation[2])  # Rotation angle in radians for Z-axis
+    theta_x = np.radians(rotate_x)  # Rotation angle in radians for X-axis
+    theta_y = np.radians(rotate_y)  # Rotation angle in radians for Y-axis
+    theta_z = np.radians(rotate_z)  # Rotation angle in radians for Z-axis
 
     # Rotation matrix for X-axis
     cos_x, sin_x = np.cos(theta_x), np.sin(theta_x)
@@ -44,12 +39,80 @@ def apply_dynamic_transformation(verts, rotation, translation):
 
     # Combine the rotation matrices: R = Rz * Ry * Rx
     combined_rotation_matrix = rotation_matrix_z @ rotation_matrix_y @ rotation_matrix_x
+    combined_rotation_matrix.flags.writeable = False  # Shared through the cache
+    return combined_rotation_matrix
+
+
+def build_transform_matrix(rotation, translation, axis_flips=(1.0, 1.0, 1.0)):
+    """4x4 matrix that flips axes, then rotates (R = Rz * Ry * Rx, degrees), then translates."""
+    matrix = np.eye(4, dtype=np.float32)
+    matrix[:3, :3] = _rotation_matrix(*(float(angle) for angle in rotation)) * np.asarray(axis_flips, dtype=np.float32)
+    matrix[:3, 3] = translation
+    return matrix
+
+
+class CropTransform:
+    """Fused axis flip, rotation, translation and threshold crop over reusable buffers.
+
+    The 4x4 matrix (axis flips folded in) is rebuilt only when the rotation or
+    translation changes. `apply` writes into buffers that grow to the largest cloud
+    seen and are then reused, so a steady-state frame allocates only the returned
+    index array. The returned points are a view into those buffers and stay valid
+    until the next call.
+    """
+
+    def __init__(self, axis_flips=CAMERA_TO_GL_FLIPS):
+        self.axis_flips = tuple(axis_flips)
+        self.key = None
+        self.matrix = None
+        self.capacity = 0
+        self._transformed = None
+        self._compacted = None
+        self._mask = None
+        self._scratch = None
+
+    def update(self, rotation, translation):
+        """Rebuild the cached matrix if the rotate/translate settings changed."""
+        key = (tuple(rotation), tuple(translation))
+        if key != self.key:
+            self.matrix = build_transform_matrix(rotation, translation, self.axis_flips)
+            self.key = key
+        return self.matrix
+
+    def _reserve(self, count):
+        if count <= self.capacity:
+            return
+        self.capacity = count
+        self._transformed = np.empty((count, 3), dtype=np.float32)
+        self._compacted = np.empty((count, 3), dtype=np.float32)
+        self._mask = np.empty(count, dtype=bool)
+        self._scratch = np.empty(count, dtype=bool)
+
+    def apply(self, verts, bounds):
+        """Transform (N, 3) camera-space points and keep those inside the bounds.
+
+        :param bounds: (x_min, x_max, y_min, y_max, z_min, z_max) in transformed space
+        :return: (points, indices) - the kept transformed points and their row indices in `verts`
+        """
+        count = len(verts)
+        self._reserve(count)
+        transformed = self._transformed[:count]
+        mask = self._mask[:count]
+        scratch = self._scratch[:count]
+
+        np.matmul(verts, self.matrix[:3, :3].T, out=transformed)
+        transformed += self.matrix[:3, 3]
 
-    # Apply the rotation to the vertices
-    rotated_verts = verts @ combined_rotation_matrix.T
+        # Six threshold tests accumulated into one mask without temporaries
+        mask.fill(True)
+        for axis in range(3):
+            column = transformed[:, axis]
+            np.greater_equal(column, bounds[2 * axis], out=scratch)
+            mask &= scratch
+            np.less_equal(column, bounds[2 * axis + 1], out=scratch)
+            mask &= scratch
 
-    # Apply translation
-    translation_vector = np.array(translation, dtype=np.float32)
-    transformed_verts = rotated_verts + translation_vector
-    
-    return transformed_verts.squeeze()  # Return to original shape if a single point
\ No newline at end of file
+        indices = np.flatnonzero(mask)
+        points = self._compacted[:len(indices)]
+        np.take(transformed, indices, axis=0, out=points, mode="clip")  # "clip" writes straight into out
+        return points, indices
@@ -0,0 +1,52 @@
+"""
+Voxel-grid downsampling for the point cloud viewer.
+
+Points are binned into cubes of `voxel_size` meters; each occupied voxel is
+replaced by the centroid of its points and the mean of their per-point
+attributes (colors or texture coordinates). At the default viewing distance many
+pixels land on the same screen spot, so drawing one point per voxel keeps the
+view readable while uploading and drawing far fewer points.
+
+Example:
+    points, texcoords = voxel_downsample(points, texcoords, voxel_size=0.02)
+"""
+
+import numpy as np
+
+# Voxel coordinates are packed into one int64 key, 21 bits per axis
+KEY_BITS = 21
+KEY_OFFSET = 1 << (KEY_BITS - 1)  # Shifts signed voxel coordinates into the unsigned range
+KEY_MASK = (1 << KEY_BITS) - 1
+
+
+def voxel_keys(points, voxel_size):
+    """Integer hash of the voxel containing each (N, 3) point."""
+    cells = np.floor(points / voxel_size).astype(np.int64)
+    cells += KEY_OFFSET
+    cells &= KEY_MASK  # Wraps beyond ~1e6 voxels per axis, far outside the scene
+    return (cells[:, 0] << (2 * KEY_BITS)) | (cells[:, 1] << KEY_BITS) | cells[:, 2]
+
+
+def voxel_downsample(points, attributes, voxel_size):
+    """Reduce points to voxel centroids with mean attributes.
+
+    :param points: (N, 3) float point positions
+    :param attributes: (N, C) per-point values (colors, texture coordinates) in any numeric dtype
+    :param voxel_size: Edge length of a voxel in the units of `points`; <= 0 disables
+    :return: (centroids, mean_attributes) as float32 arrays with one row per occupied voxel
+    """
+    if voxel_size <= 0 or len(points) == 0:
+        return points, attributes
+
+    _, inverse, counts = np.unique(voxel_keys(points, voxel_size), return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)  # NumPy 2 keeps the input shape for the inverse
+    voxel_count = len(counts)
+
+    centroids = np.empty((voxel_count, 3), dtype=np.float32)
+    for axis in range(3):
+        centroids[:, axis] = np.bincount(inverse, weights=points[:, axis], minlength=voxel_count) / counts
+
+    mean_attributes = np.empty((voxel_count, attributes.shape[1]), dtype=np.float32)
+    for channel in range(attributes.shape[1]):
+        mean_attributes[:, channel] = np.bincount(inverse, weights=attributes[:, channel], minlength=voxel_count) / counts
+    return centroids, mean_attributes
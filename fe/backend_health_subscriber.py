@@ -0,0 +1,68 @@
+"""
+Subscriber for the backend's push-based health endpoint.
+
+Keeps one TCP connection to the backend and emits every status frame it pushes
+(newline-delimited JSON). When the connection drops or goes quiet for longer
+than `stale_after` seconds, a disconnected status is emitted and the subscriber
+reconnects.
+"""
+
+import json
+import socket
+from PyQt5.QtCore import QThread, pyqtSignal
+
+DISCONNECTED_STATUS = {"camera": "disconnected", "backend": "unreachable"}
+
+
+class BackendHealthSubscriber(QThread):
+    """
+    Persistent health subscriber running in its own thread.
+
+    Attributes:
+        status_received (pyqtSignal): Emitted with each status dictionary
+        running (bool): Flag to control the subscriber loop
+    """
+
+    status_received = pyqtSignal(dict)
+
+    def __init__(self, host="localhost", port=12345, stale_after=3.0, retry_interval=1.0):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.stale_after = stale_after  # Backend pushes every 0.5 s, so silence this long means trouble
+        self.retry_interval = retry_interval
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                with socket.create_connection((self.host, self.port), timeout=self.stale_after) as s:
+                    s.settimeout(self.stale_after)
+                    self._read_statuses(s)
+            except OSError:
+                pass  # Refused, reset or timed out; report and retry below
+
+            if self.running:
+                self.status_received.emit(dict(DISCONNECTED_STATUS))
+                self.msleep(int(self.retry_interval * 1000))
+
+    def _read_statuses(self, s):
+        buffer = b""
+        while self.running:
+            data = s.recv(4096)
+            if not data:
+                return  # Backend closed the connection
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    self.status_received.emit(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+
+    def stop(self):
+        """Stop the subscriber; returns once the connection is closed."""
+        self.running = False
+        self.wait()
@@ -1,7 +1,7 @@
-import socket
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QHBoxLayout, QButtonGroup
-from PyQt5.QtCore import Qt, QEvent, QSettings, QTimer
+from PyQt5.QtCore import Qt, QEvent, QSettings, QCoreApplication
 from preset_manager import PresetManager
+from backend_health_subscriber import BackendHealthSubscriber
 
 class VersionControlPanel(QWidget):
     """
@@ -106,34 +106,26 @@ class VersionControlPanel(QWidget):
         self.setLayout(layout)
 
     def start_camera_status_check(self):
-        """Start periodic checks for the camera connection status."""
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_camera_status)
-        self.timer.start(1000)  # Check every second
-
-    def update_camera_status(self):
-        """Check the camera status from the server and update the UI label."""
-        status = self.check_camera_status()
-        if status == "connected":
-            self.camera_status_label.setText("Camera Connected/Backend Running: ✅")
+        """Subscribe to the backend's pushed camera and health status."""
+        self.health_subscriber = BackendHealthSubscriber()
+        self.health_subscriber.status_received.connect(self.update_camera_status)  # Queued to the GUI thread
+        self.health_subscriber.start()
+        QCoreApplication.instance().aboutToQuit.connect(self.health_subscriber.stop)
+
+    def update_camera_status(self, status):
+        """Update the UI label from a status frame pushed by the backend."""
+        if status.get("camera") == "connected":
+            fps = status.get("capture_fps", 0.0)
+            self.camera_status_label.setText(f"Camera Connected/Backend Running: ✅ ({fps:.0f} fps)")
             # self.camera_status_label.setStyleSheet("font-weight: bold; font-size: 14px; color: green;")
         else:
             self.camera_status_label.setText("Camera Connected/Backend Running: ❌")
             # self.camera_status_label.setStyleSheet("font-weight: bold; font-size: 14px; color: black;")
 
-    def check_camera_status(self):
-        """Query the RealSenseManager server to check camera status."""
-        host = "localhost"
-        port = 12345
-
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(10)  # 1 second timeout
-                s.connect((host, port))
-                status = s.recv(1024).decode().strip()
-                return status
-        except Exception:
-            return "disconnected"
+        latencies = status.get("latency_ms", {})
+        self.camera_status_label.setToolTip(
+            "\n".join(f"{stage}: {value:.1f} ms" for stage, value in latencies.items())
+        )
 
     def apply_preset(self, preset_name: str):
         """Apply the selected preset and save the selection."""